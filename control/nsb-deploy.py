@@ -1,56 +1,139 @@
 #!/usr/bin/env python3
 import argparse
 import concurrent.futures
+import itertools
 import logging
 import time
 from astropy.units import MiB
 import etcd3
+import functools
 import subprocess
 import json
 import os
+import shlex
 import sys
-from typing import Dict, Any, Tuple
+import threading
+from typing import Dict, Any, Optional, Tuple
 from scheduler import parse_cpu, parse_mem
+try:
+    # Optional: faster JSON decoding of etcd values and config files
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads  # stdlib also accepts UTF-8 bytes
 
 
 logging.basicConfig(level="INFO", format="[%(levelname)s] %(message)s")
 log = logging.getLogger(__name__)
 
+DEFAULT_NODE_IMAGE = 'msvcbench/sat-container:latest'
+
 # ==========================================
 # HELPERS
 # ==========================================
+# Allow large range responses and keep the channel alive between requests
+ETCD_GRPC_OPTIONS = [
+    ('grpc.max_receive_message_length', 64 * 1024 * 1024),
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
 def connect_etcd(etcd_host: str, etcd_port: int, etcd_user = None, etcd_password = None, etcd_ca_cert = None):
     try:
         log.info(f"📁 Connecting to Etcd at {etcd_host}:{etcd_port}...")
         if etcd_user and etcd_password:
-            client = etcd3.client(host=etcd_host, port=etcd_port, user=etcd_user, password=etcd_password, ca_cert=etcd_ca_cert)
+            client = etcd3.client(host=etcd_host, port=etcd_port, user=etcd_user, password=etcd_password, ca_cert=etcd_ca_cert, grpc_options=ETCD_GRPC_OPTIONS)
             client.status()  # Test connection, if fail will raise
             return client
         else:
-            client = etcd3.client(host=etcd_host, port=etcd_port)
+            client = etcd3.client(host=etcd_host, port=etcd_port, grpc_options=ETCD_GRPC_OPTIONS)
             client.status()  # Test connection, if fail will raise
             return client
     except Exception as e:
         log.error(f"❌ Failed to initialize Etcd client: {e}")
         sys.exit(1)
 
+# Keys per Range request when scanning a prefix, keeps each response far
+# below the gRPC message size limit also for very large constellations
+ETCD_PAGE_SIZE = 1000
+ETCD_TXN_MAX_OPS = 128  # etcd default --max-txn-ops
+# Readiness polls scan /config/nodes/ only while this fraction of all nodes
+# is pending, otherwise the pending keys are read with a few Get transactions
+READY_SCAN_FRACTION = 0.25
+
+def iter_prefix(etcd, prefix: str):
+    """
+    Yield (value, key) for every key under prefix, fetched in pages of
+    ETCD_PAGE_SIZE keys, all read at the revision of the first page.
+    """
+    # etcd3's get_range() drops limit/revision, so the RangeRequest is built here
+    request = etcd3.etcdrpc.RangeRequest(
+        key=etcd3.utils.to_bytes(prefix),
+        range_end=etcd3.utils.increment_last_byte(etcd3.utils.to_bytes(prefix)),
+        limit=ETCD_PAGE_SIZE,
+        sort_order=etcd3.etcdrpc.RangeRequest.ASCEND,
+        sort_target=etcd3.etcdrpc.RangeRequest.KEY,
+    )
+    while True:
+        resp = etcd.kvstub.Range(
+            request, etcd.timeout,
+            credentials=etcd.call_credentials, metadata=etcd.metadata,
+        )
+        for kv in resp.kvs:
+            yield kv.value, kv.key
+        if not resp.more or not resp.kvs:
+            return
+        request.revision = resp.header.revision
+        request.key = resp.kvs[-1].key + b'\0'
+
 def get_prefix_data(etcd, prefix: str) -> Dict[str, Any]:
     data: Dict[str, Any] = {}
-    for value, metadata in etcd.get_prefix(prefix):
-        key = metadata.key.decode('utf-8').split('/')[-1]
+    for value, raw_key in iter_prefix(etcd, prefix):
+        key = raw_key.decode('utf-8').split('/')[-1]
         try:
-            data[key] = json.loads(value.decode('utf-8'))
+            data[key] = json_loads(value)
         except json.JSONDecodeError:
             log.warning(f"⚠️ Warning: Could not parse JSON for key {key} under {prefix}")
     return data
 
 
+def get_ready_nodes(etcd, names, total_nodes: int) -> set:
+    """
+    Return the subset of names whose /config/nodes/ entry has an eth0_ip.
+    """
+    names = list(names)
+    if len(names) >= READY_SCAN_FRACTION * total_nodes:
+        current_nodes = get_prefix_data(etcd, '/config/nodes/')
+        return {name for name in names if 'eth0_ip' in current_nodes.get(name, {})}
+    ready = set()
+    for i in range(0, len(names), ETCD_TXN_MAX_OPS):
+        chunk = names[i:i + ETCD_TXN_MAX_OPS]
+        _, responses = etcd.transaction(
+            compare=[],
+            success=[etcd.transactions.get(f'/config/nodes/{name}') for name in chunk],
+            failure=[],
+        )
+        for name, kvs in zip(chunk, responses):
+            # Cheap prefilter before decoding, as nodes only gain eth0_ip once up
+            if kvs and b'eth0_ip' in kvs[0][0] and 'eth0_ip' in json_loads(kvs[0][0]):
+                ready.add(name)
+    return ready
+
+
 class SshError(RuntimeError):
     pass
 
 class RemoteCommandError(RuntimeError):
     pass
 
+# ssh/scp to the same worker share one master connection (opened by the first
+# session, kept for a while after the last one), so only one handshake per host
+SSH_MUX_OPTS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/cm-%r@%h:%p",
+    "-o", "ControlPersist=60s",
+]
+
 def run_ssh(
     *,
     ssh_username: str,
@@ -60,20 +143,26 @@ def run_ssh(
     check: bool = False,
     quiet: bool = False,
     timeout: int = 30,
+    connect_timeout: int = 8,
 ) -> subprocess.CompletedProcess:
     """
     Run: ssh -i <key> user@host <remote_args...>
 
+    connect_timeout bounds the ssh connection setup, timeout the remote
+    command once connected.
+
     - Raises SshError on SSH transport problems
     - Raises RemoteCommandError if check=True and remote command fails
     - Error messages are concise (only stderr summary)
+    - Output is captured as bytes; only the first stderr line is decoded
     """
     cmd = [
         "ssh",
         "-i", ssh_key_path,
         "-o", "BatchMode=yes",
         "-o", "StrictHostKeyChecking=no",
-        "-o", f"ConnectTimeout={timeout}",
+        "-o", f"ConnectTimeout={connect_timeout}",
+        *SSH_MUX_OPTS,
         f"{ssh_username}@{ssh_host}",
         "--",
         *remote_args,
@@ -82,28 +171,55 @@ def run_ssh(
     try:
         cp = subprocess.run(
             cmd,
-            text=True,
             stdout=(subprocess.DEVNULL if quiet else subprocess.PIPE),
             stderr=(subprocess.DEVNULL if quiet else subprocess.PIPE),
-            timeout=timeout + 5,
+            timeout=connect_timeout + timeout,
         )
     except subprocess.TimeoutExpired:
         raise SshError(f"SSH timeout connecting to {ssh_username}@{ssh_host}")
 
-    stderr = (cp.stderr or "").strip()
+    stderr = (cp.stderr or b"").strip().split(b"\n", 1)[0].decode("utf-8", "replace")
 
     # SSH transport failures are typically exit code 255
     if cp.returncode == 255:
-        msg = stderr.splitlines()[0] if stderr else "SSH transport error"
+        msg = stderr or "SSH transport error"
         raise SshError(msg)
 
     if check and cp.returncode != 0:
-        msg = stderr.splitlines()[0] if stderr else "Remote command failed"
+        msg = stderr or "Remote command failed"
         log.error(f"❌ {msg}")
         raise RemoteCommandError(msg)
 
     return cp
 
+@functools.lru_cache(maxsize=None)
+def docker_run_common_opts(
+    worker_bridge: str,
+    etcd_host: str,
+    etcd_port: int,
+    etcd_user: str = None,
+    etcd_password: str = None,
+    with_ca_cert: bool = False,
+) -> str:
+    """
+    Shell-quoted `docker run` options shared by all nodes on the same
+    bridge and etcd endpoint; built once per combination.
+    """
+    # Images are pulled once per worker by prepull_images() before deploying
+    opts = [
+        "--net", worker_bridge,
+        "--privileged",
+        "--pull=missing",
+        "-e", f"ETCD_ENDPOINT={etcd_host}:{etcd_port}",
+    ]
+    if etcd_user and etcd_password and with_ca_cert:
+        opts.extend([
+            "-e", f"ETCD_USER={etcd_user}",
+            "-e", f"ETCD_PASSWORD={etcd_password}",
+            "-e", f"ETCD_CA_CERT=/app/etcd-ca.crt",
+        ])
+    return shlex.join(opts)
+
 def recreate_and_run_container(
     *,
     node_name: str,
@@ -121,48 +237,18 @@ def recreate_and_run_container(
     etcd_user: str = None,
     etcd_password: str = None,
     etcd_ca_cert: str = None,
+    ssh_connect_timeout: int = 8,
 ) -> None:
 
     try:
-        # --- Check if container exists ---
-        ps = run_ssh(
-            ssh_username=ssh_username,
-            ssh_host=worker,
-            ssh_key_path=ssh_key_path,
-            remote_args=["docker", "ps", "-a", "--format", "{{.Names}}"],
-            check=True,  # if docker command fails, raise RemoteCommandError
-        )
-
-        names = ps.stdout.splitlines() if ps.stdout else []
-        exists = node_name in names
-
-        # --- Remove existing container (ignore errors, but still raise SSH transport errors) ---
-        if exists:
-            run_ssh(
-                ssh_username=ssh_username,
-                ssh_host=worker,
-                ssh_key_path=ssh_key_path,
-                remote_args=["docker", "rm", "-f", node_name],
-                check=False,   # ignore non-zero from docker rm
-                quiet=True,
-            )
         # --- Run new container ---
+        # Only the per-node fields are built here, the rest comes from the cached options
         run_cmd = [
                 "docker", "run", "-d",
                 "--name", node_name,
                 "--hostname", node_name,
-                "--net", worker_bridge,
-                "--privileged",
-                "--pull=always",
                 "-e", f"NODE_NAME={node_name}",
-                "-e", f"ETCD_ENDPOINT={etcd_host}:{etcd_port}"
         ]
-        if etcd_user and etcd_password and etcd_ca_cert:
-            run_cmd.extend([
-                "-e", f"ETCD_USER={etcd_user}",
-                "-e", f"ETCD_PASSWORD={etcd_password}",
-                "-e", f"ETCD_CA_CERT=/app/etcd-ca.crt",
-            ])
         if cpu_requested > 0:
             run_cmd.extend(["--cpu-shares", str(int(cpu_requested*1024))])  # convert CPU to CPU shares (1024 = 1 CPU)
         else:
@@ -173,51 +259,55 @@ def recreate_and_run_container(
              run_cmd.extend(["--cpus", str(cpu_limit)])
         if mem_limit != "0MiB":
              run_cmd.extend(["--memory", str(mem_limit)])
-        run_cmd.append(container_image) 
+        common_opts = docker_run_common_opts(
+            worker_bridge, etcd_host, etcd_port, etcd_user, etcd_password, bool(etcd_ca_cert)
+        )
 
-        run_ssh(
-            ssh_username=ssh_username,
-            ssh_host=worker,
-            ssh_key_path=ssh_key_path,
-            remote_args=run_cmd,
-            check=True,
+        # --- Remove any existing container (docker rm -f tolerates a missing one) ---
+        script = (
+            f"docker rm -f {shlex.quote(node_name)} >/dev/null 2>&1; "
+            f"{shlex.join(run_cmd)} {common_opts} {shlex.quote(container_image)}"
         )
 
-        # copy the CA cert if needed with scp and then and docker cp via ssh
+        # copy the CA cert if needed with scp, then docker cp it in the same ssh
+        # session as docker run (the agent waits for the file before connecting)
         if etcd_user and etcd_password and etcd_ca_cert:
             scp_cmd = [
                 "scp",
                 "-i", ssh_key_path,
                 "-o", "BatchMode=yes",
                 "-o", "StrictHostKeyChecking=no",
-                "-o", f"ConnectTimeout=30",
+                "-o", f"ConnectTimeout={ssh_connect_timeout}",
+                *SSH_MUX_OPTS,
                 etcd_ca_cert,
                 f"{ssh_username}@{worker}:/tmp/etcd-ca.crt",
             ]
             try:
                 cp = subprocess.run(
                     scp_cmd,
-                    text=True,
                     stdout=subprocess.DEVNULL,
                     stderr=subprocess.PIPE,
-                    timeout=35,
+                    timeout=ssh_connect_timeout + 30,
                 )
             except subprocess.TimeoutExpired:
                 raise SshError(f"SCP timeout connecting to {ssh_username}@{worker}")
             
-            stderr = (cp.stderr or "").strip()
+            stderr = (cp.stderr or b"").strip().split(b"\n", 1)[0].decode("utf-8", "replace")
             if cp.returncode != 0:
-                msg = stderr.splitlines()[0] if stderr else "SCP transport error"
+                msg = stderr or "SCP transport error"
                 raise SshError(msg)
             
-            # now copy into the container
-            run_ssh(
-                ssh_username=ssh_username,
-                ssh_host=worker,
-                ssh_key_path=ssh_key_path,
-                remote_args=["docker", "cp", "/tmp/etcd-ca.crt", f"{node_name}:/app/etcd-ca.crt"],
-                check=True,
-            )
+            script += f" && docker cp /tmp/etcd-ca.crt {shlex.quote(node_name + ':/app/etcd-ca.crt')}"
+
+        # --- Remove, run (and cp) in a single ssh session ---
+        run_ssh(
+            ssh_username=ssh_username,
+            ssh_host=worker,
+            ssh_key_path=ssh_key_path,
+            remote_args=["sh", "-c", shlex.quote(script)],
+            check=True,
+            connect_timeout=ssh_connect_timeout,
+        )
     except SshError as e:
         print(f"    ❌ SSH failure: {e}")
         raise RuntimeError({e})
@@ -225,61 +315,121 @@ def recreate_and_run_container(
         print(f"    ❌ Remote command failed: {e}")
         raise RuntimeError({e})
 
+def resolve_worker_targets(workers: Dict[str, Any]) -> Dict[str, Tuple[str, str, str, str]]:
+    """
+    Returns: {worker: (ip, ssh_user, ssh_key, sat_vnet)}, resolved once per
+    worker instead of once per node.
+    """
+    return {
+        worker: (
+            info.get('ip', None),
+            info.get('ssh-user', 'ubuntu'),
+            info.get('ssh-key', '~/.ssh/id_rsa'),
+            info.get('sat-vnet', 'sat-vnet'),
+        )
+        for worker, info in workers.items()
+    }
+
+def prepull_images(
+    nodes: Dict[str, Any],
+    worker_targets: Dict[str, Tuple[str, str, str, str]],
+    executor: concurrent.futures.Executor,
+    ssh_connect_timeout: int = 8,
+) -> None:
+    """
+    Pull each distinct (worker, image) pair once, in parallel, so that the
+    containers start with --pull=missing instead of one registry check per node.
+    Failures are only logged: docker run still pulls a missing image.
+    """
+    pairs = {
+        (node.get('worker'), node.get('image', DEFAULT_NODE_IMAGE))
+        for node in nodes.values()
+        if node.get('worker') in worker_targets
+    }
+    futures = {}
+    for worker, image in pairs:
+        worker_ip, ssh_user, ssh_key, _ = worker_targets[worker]
+        future = executor.submit(
+            run_ssh,
+            ssh_username=ssh_user,
+            ssh_host=worker_ip,
+            ssh_key_path=ssh_key,
+            remote_args=["docker", "pull", "-q", image],
+            check=True,
+            timeout=600,
+            connect_timeout=ssh_connect_timeout,
+        )
+        futures[future] = (worker, image)
+    for fut in concurrent.futures.as_completed(futures):
+        worker, image = futures[fut]
+        try:
+            fut.result()
+            log.info(f"📦 Pulled {image} on worker={worker}")
+        except Exception as e:
+            log.warning(f"⚠️ Failed to pull {image} on worker={worker}: {e}")
+
 def create_one_node(
     name: str,
     node: Dict[str, Any],
-    workers: Dict[str, Any],
+    worker_targets: Dict[str, Tuple[str, str, str, str]],
     etcd_host: str,
     etcd_port: int,
     etcd_user: str = None,
     etcd_password: str = None,
     etcd_ca_cert: str = None,    
+    host_slots: Optional[Dict[str, threading.Semaphore]] = None,
+    ssh_connect_timeout: int = 8,
 ) -> Tuple[str, bool, str]:
     """
     Returns: (name, success, message)
+
+    host_slots, if given, holds one semaphore per worker that bounds the
+    concurrent ssh sessions opened towards it.
     """
     worker = node.get('worker', None)
     if not worker:
         return name, False, "❌ Missing 'worker' field in node config"
 
-    if worker not in workers:
+    if worker not in worker_targets:
         return name, False, f"❌ Unknown worker '{worker}' (node assigned to non-existing /config/workers entry)"
 
-    worker_info = workers[worker]
-    worker_ip = worker_info.get('ip', None)
-    ssh_user = worker_info.get('ssh-user', 'ubuntu')
-    ssh_key = worker_info.get('ssh-key', '~/.ssh/id_rsa')
-    worker_bridge = worker_info.get('sat-vnet', 'sat-vnet')
-    image = node.get('image', 'msvcbench/sat-container:latest')
+    worker_ip, ssh_user, ssh_key, worker_bridge = worker_targets[worker]
+    image = node.get('image', DEFAULT_NODE_IMAGE)
     cpu_requested = float(parse_cpu(node.get('cpu-request', 0.0)))
     mem_requested = f"{parse_mem(node.get('mem-request', '0MiB'))*1024}MiB"
     cpu_limit = float(parse_cpu(node.get('cpu-limit', 0.0)))
     mem_limit = f"{parse_mem(node.get('mem-limit', '0MiB'))*1024}MiB"
 
+    slot = host_slots[worker] if host_slots else threading.Semaphore()
     try:
-        cmd = recreate_and_run_container(
-            node_name=name,
-            worker=worker_ip,
-            ssh_username=ssh_user,
-            ssh_key_path=ssh_key,
-            worker_bridge=worker_bridge,
-            container_image=image,
-            cpu_requested=cpu_requested,
-            mem_requested=mem_requested,
-            cpu_limit=cpu_limit,
-            mem_limit=mem_limit,
-            etcd_host=etcd_host,
-            etcd_port=etcd_port,
-            etcd_user=etcd_user,
-            etcd_password=etcd_password,
-            etcd_ca_cert=etcd_ca_cert,
-        )
+        with slot:
+            recreate_and_run_container(
+                node_name=name,
+                worker=worker_ip,
+                ssh_username=ssh_user,
+                ssh_key_path=ssh_key,
+                worker_bridge=worker_bridge,
+                container_image=image,
+                cpu_requested=cpu_requested,
+                mem_requested=mem_requested,
+                cpu_limit=cpu_limit,
+                mem_limit=mem_limit,
+                etcd_host=etcd_host,
+                etcd_port=etcd_port,
+                etcd_user=etcd_user,
+                etcd_password=etcd_password,
+                etcd_ca_cert=etcd_ca_cert,
+                ssh_connect_timeout=ssh_connect_timeout,
+            )
         msg = f" Created on worker={worker}"
         return name, True, msg
     except Exception as e:
         return name, False, f"❌ Deployment failed: {e}"
     
 
+# Log prefix per node type, other types use the satellite one
+NODE_TYPE_ICONS = {"satellite": "🛰️", "user": "👤", "gateway": "📡"}
+
 # ==========================================
 # MAIN
 # ==========================================
@@ -335,6 +485,18 @@ def main() -> int:
         default=os.getenv("ETCD_CA_CERT", None ),
         help="Path to Etcd CA certificate (default: env ETCD_CA_CERT or None)",
     )
+    parser.add_argument(
+        "--per-host-concurrency",
+        type=int,
+        default=4,
+        help="Max concurrent container creations (ssh sessions) per worker host (default: 4).",
+    )
+    parser.add_argument(
+        "--ssh-connect-timeout",
+        type=int,
+        default=8,
+        help="Seconds to wait for the ssh connection to a worker (default: 8).",
+    )
     parser.add_argument("--fix", action="store_true", help="Fix mode: check existing nodes and redeploy those with no eth0_ip configured.")
     parser.add_argument(
         "--log-level",
@@ -349,44 +511,49 @@ def main() -> int:
         log.error("❌ --threads must be >= 1")
         return 2
 
+    if args.per_host_concurrency < 1:
+        log.error("❌ --per-host-concurrency must be >= 1")
+        return 2
+
     etcd_client = connect_etcd(args.etcd_host, args.etcd_port, args.etcd_user, args.etcd_password, args.etcd_ca_cert)
 
+    # 1) LOAD CONFIGURATION
+    # The two prefixes are independent, fetch them concurrently
     try:
-        no_nodes = True
-        existing_nodes = etcd_client.get_prefix("/config/nodes/")
-        for node in existing_nodes:
-            no_nodes=False
-            node_config = json.loads(node[0].decode('utf-8')) if node[0] else None
-            if "eth0_ip" in node_config and not args.fix:
-                log.warning("⚠️  Nodes already found in Etcd under /config/nodes/ with eth0_ip configured. This may indicate nsb-deploy has been already run.")
-                cont = input("Do you want to continue with nsb-deploy? (y/n): ")
-                if cont.lower() != 'y':
-                    log.info("Exiting as per user request.")
-                    sys.exit(0)
-                else:                    
-                    break
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            workers_future = executor.submit(get_prefix_data, etcd_client, '/config/workers/')
+            nodes_future = executor.submit(get_prefix_data, etcd_client, '/config/nodes/')
+            workers = workers_future.result()
+            all_nodes = nodes_future.result()
     except Exception as e:
-        log.error(f"❌ Error checking existing nodes in Etcd: {e}")
+        log.error(f"❌ Error loading configuration from Etcd: {e}")
         sys.exit(1)
 
-    if no_nodes:
+    if not all_nodes:
         log.error("❌ No nodes found in Etcd under /config/nodes/. This may indicate nsb-init has not been run.")
         sys.exit(0)
-            
-    # 1) LOAD CONFIGURATION
-    workers = get_prefix_data(etcd_client, '/config/workers/')
-    all_nodes = get_prefix_data(etcd_client, '/config/nodes/')
-    all_nodes_filtered = {}
-    node_types = args.type.split(",")
-    if "any" in node_types:
-        all_nodes_filtered = all_nodes
-    else:
-        for node_type in node_types:
-            all_nodes_filtered = {name:node for name,node in all_nodes.items() if node.get("type","undefined") == node_type}
+
+    for node_config in all_nodes.values():
+        if "eth0_ip" in node_config and not args.fix:
+            log.warning("⚠️  Nodes already found in Etcd under /config/nodes/ with eth0_ip configured. This may indicate nsb-deploy has been already run.")
+            cont = input("Do you want to continue with nsb-deploy? (y/n): ")
+            if cont.lower() != 'y':
+                log.info("Exiting as per user request.")
+                sys.exit(0)
+            else:                    
+                break
 
     if args.fix:
          log.info("🔧 Fix mode enabled: will check existing nodes and redeploy those with no eth0_ip configured.")
-         all_nodes_filtered = {name:node for name,node in all_nodes_filtered.items() if node.get("eth0_ip", None) is None}
+
+    # Type and fix-mode selection in a single pass over the nodes
+    node_types = set(args.type.split(","))
+    any_type = "any" in node_types
+    all_nodes_filtered = {
+        name: node for name, node in all_nodes.items()
+        if (any_type or node.get("type", "undefined") in node_types)
+        and not (args.fix and node.get("eth0_ip", None) is not None)
+    }
     
     log.info(f"🔎 Found {len(all_nodes_filtered)} nodes, to deploy.")
     
@@ -405,19 +572,50 @@ def main() -> int:
     ok = 0
     fail = 0
 
+    # Interleave nodes of different workers so that the threads run on
+    # distinct hosts instead of queuing on the docker daemon of the first one
+    # Nodes with a missing or unknown worker fail here, before any pool slot is used
+    nodes_by_worker: Dict[str, list] = {}
+    for name, node in all_nodes_filtered.items():
+        worker = node.get("worker")
+        if not worker:
+            msg = "❌ Missing 'worker' field in node config"
+        elif worker not in workers:
+            msg = f"❌ Unknown worker '{worker}' (node assigned to non-existing /config/workers entry)"
+        else:
+            nodes_by_worker.setdefault(worker, []).append((name, node))
+            continue
+        log.info(f"{NODE_TYPE_ICONS.get(node.get('type'), '🛰️')} {name}: {msg}")
+        fail += 1
+    deploy_order = [
+        item
+        for round_items in itertools.zip_longest(*nodes_by_worker.values())
+        for item in round_items
+        if item is not None
+    ]
+
+    # Cap the ssh sessions each worker's sshd sees at once (MaxStartups),
+    # cross-host parallelism is still bounded by --threads only
+    host_slots = {worker: threading.Semaphore(args.per_host_concurrency) for worker in workers}
+    worker_targets = resolve_worker_targets(workers)
+
     with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads) as executor:
+        prepull_images(all_nodes_filtered, worker_targets, executor, args.ssh_connect_timeout)
+
         futures = {}
-        for name, node in all_nodes_filtered.items():
+        for name, node in deploy_order:
             future = executor.submit(
                 create_one_node,
                 name,
                 node,
-                workers,
+                worker_targets,
                 etcd_host=args.node_etcd_host,
                 etcd_port=args.node_etcd_port,
                 etcd_user=args.etcd_user,
                 etcd_password=args.etcd_password,
                 etcd_ca_cert=args.etcd_ca_cert,
+                host_slots=host_slots,
+                ssh_connect_timeout=args.ssh_connect_timeout,
             )
             futures[future] = name
 
@@ -431,15 +629,7 @@ def main() -> int:
                 node_name = name
 
             # Print per-node result
-            if all_nodes_filtered[node_name].get("type") == "satellite":
-                prefix = "🛰️"
-            elif all_nodes_filtered[node_name].get("type") == "user":
-                prefix = "👤"
-            elif all_nodes_filtered[node_name].get("type") == "gateway":
-                prefix = "📡"
-            else:
-                prefix = "🛰️"
-            
+            prefix = NODE_TYPE_ICONS.get(all_nodes_filtered[node_name].get("type"), "🛰️")
             log.info(f"{prefix} {node_name}: {msg}")
 
             if success:
@@ -454,18 +644,14 @@ def main() -> int:
         return 3
 
     # wait that all deployed node have put their eth0_ip in etcd
-    all_ready = False
+    pending = set(all_nodes_filtered)
     for _ in range(60):  # wait up to 60 seconds for all nodes to report in
-        all_ready = True
-        for name, node in all_nodes_filtered.items():
-            val, _ = etcd_client.get(f"/config/nodes/{name}")   
-            val = json.loads(val.decode('utf-8')) if val else None
-            if 'eth0_ip' not in val:
-                all_ready = False
-                break
-        if all_ready:
+        # Only nodes still pending are polled again
+        pending -= get_ready_nodes(etcd_client, pending, len(all_nodes))
+        if not pending:
             break
         time.sleep(1)
+    all_ready = not pending
     time.sleep(5)  # extra wait to ensure all services inside the containers are up
     if not all_ready:
         log.warning("⚠️ Some nodes did not report their eth0_ip in Etcd within the expected time. Could be an Etcd connection problem")
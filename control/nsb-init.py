@@ -9,10 +9,16 @@ import os
 import sys
 from itertools import islice
 from typing import Any, Mapping
+try:
+    # Optional: faster JSON decoding of etcd values and config files
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads  # stdlib also accepts UTF-8 bytes
 
 logging.basicConfig(level="INFO", format="[%(levelname)s] %(message)s")
 log = logging.getLogger("nsb-init")
 scheduler_impl = None
+ETCD_TXN_MAX_OPS = 128  # etcd default --max-txn-ops
 
 # ==========================================
 # ETCD CONNECTION
@@ -41,7 +47,7 @@ def get_prefix_data(etcd, prefix: str) -> dict[str, Any]:
     for value, metadata in etcd.get_prefix(prefix):
         key = metadata.key.decode('utf-8').split('/')[-1]
         try:
-            data[key] = json.loads(value.decode('utf-8'))
+            data[key] = json_loads(value)
         except json.JSONDecodeError:
             log.warning(f"⚠️ Warning: Could not parse JSON for key {key} under {prefix}")
     return data
@@ -236,22 +242,26 @@ def apply_config_to_etcd(etcd, sat_config_data: dict, worker_config_data: dict)
    
     try:
         allowed_keys = {"epoch-config", "nodes", "node-config-common"}
+        ops = []
         for key, cfg in sat_config_data.items():
             if key not in allowed_keys:
                 log.warning(f"⚠️ Unexpected key '{key}', allowed keys are {allowed_keys}, skipping...")
                 continue
             elif key in ["epoch-config"]:
-                etcd.put(f"/config/{key}", json.dumps(cfg))
+                ops.append(etcd.transactions.put(f"/config/{key}", json.dumps(cfg)))
             elif key == "nodes":
                 for node_name, node_cfg in cfg.items():
                     # Write to Etcd under /config/nodes/{node_name}
                     key = f"/config/nodes/{node_name}"
-                    etcd.put(key, json.dumps(node_cfg))
+                    ops.append(etcd.transactions.put(key, json.dumps(node_cfg)))
         # update worker info on etcd
         for worker_name, worker_cfg in worker_config_data.items():
             # Write to Etcd under /config/workers/{worker_name}
             key = f"/config/workers/{worker_name}"
-            etcd.put(key, json.dumps(worker_cfg))
+            ops.append(etcd.transactions.put(key, json.dumps(worker_cfg)))
+        # One transaction (one Raft commit) per ETCD_TXN_MAX_OPS keys instead of one per key
+        for i in range(0, len(ops), ETCD_TXN_MAX_OPS):
+            etcd.transaction(compare=[], success=ops[i:i + ETCD_TXN_MAX_OPS], failure=[])
         log.info("👍 Successfully injected satellite system config to Etcd.")
         log.info("▶️ Proceed with nsb.py deploy to deploy node containers on workers.")
     except Exception as e:
@@ -446,8 +456,8 @@ def main() -> int:
         sys.exit(1)
 
     try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            sat_config_data = json.load(f)
+        with open(config_file, "rb") as f:
+            sat_config_data = json_loads(f.read())
     except Exception as e:
         log.error(f"❌ Failed to load file: {e}")
         return 1
@@ -5,12 +5,19 @@ import logging
 import time
 from astropy.units import MiB
 import etcd3
+import functools
 import subprocess
 import json
 import os
+import shlex
 import sys
 from typing import Dict, Any, Tuple
 from scheduler import parse_cpu, parse_mem
+try:
+    # Optional: faster JSON decoding of etcd values and config files
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads  # stdlib also accepts UTF-8 bytes
 
 
 logging.basicConfig(level="INFO", format="[%(levelname)s] %(message)s")
@@ -19,27 +26,64 @@ log = logging.getLogger(__name__)
 # ==========================================
 # HELPERS
 # ==========================================
+# Allow large range responses and keep the channel alive between requests
+ETCD_GRPC_OPTIONS = [
+    ('grpc.max_receive_message_length', 64 * 1024 * 1024),
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
 def connect_etcd(etcd_host: str, etcd_port: int, etcd_user = None, etcd_password = None, etcd_ca_cert = None):
     try:
         log.info(f"📁 Connecting to Etcd at {etcd_host}:{etcd_port}...")
         if etcd_user and etcd_password:
-            client = etcd3.client(host=etcd_host, port=etcd_port, user=etcd_user, password=etcd_password, ca_cert=etcd_ca_cert)
+            client = etcd3.client(host=etcd_host, port=etcd_port, user=etcd_user, password=etcd_password, ca_cert=etcd_ca_cert, grpc_options=ETCD_GRPC_OPTIONS)
             client.status()  # Test connection, if fail will raise
             return client
         else:
-            client = etcd3.client(host=etcd_host, port=etcd_port)
+            client = etcd3.client(host=etcd_host, port=etcd_port, grpc_options=ETCD_GRPC_OPTIONS)
             client.status()  # Test connection, if fail will raise
             return client
     except Exception as e:
         log.error(f"❌ Failed to initialize Etcd client: {e}")
         sys.exit(1)
 
+# Keys per Range request when scanning a prefix, keeps each response far
+# below the gRPC message size limit also for very large constellations
+ETCD_PAGE_SIZE = 1000
+
+def iter_prefix(etcd, prefix: str):
+    """
+    Yield (value, key) for every key under prefix, fetched in pages of
+    ETCD_PAGE_SIZE keys, all read at the revision of the first page.
+    """
+    # etcd3's get_range() drops limit/revision, so the RangeRequest is built here
+    request = etcd3.etcdrpc.RangeRequest(
+        key=etcd3.utils.to_bytes(prefix),
+        range_end=etcd3.utils.increment_last_byte(etcd3.utils.to_bytes(prefix)),
+        limit=ETCD_PAGE_SIZE,
+        sort_order=etcd3.etcdrpc.RangeRequest.ASCEND,
+        sort_target=etcd3.etcdrpc.RangeRequest.KEY,
+    )
+    while True:
+        resp = etcd.kvstub.Range(
+            request, etcd.timeout,
+            credentials=etcd.call_credentials, metadata=etcd.metadata,
+        )
+        for kv in resp.kvs:
+            yield kv.value, kv.key
+        if not resp.more or not resp.kvs:
+            return
+        request.revision = resp.header.revision
+        request.key = resp.kvs[-1].key + b'\0'
+
 def get_prefix_data(etcd, prefix: str) -> Dict[str, Any]:
     data: Dict[str, Any] = {}
-    for value, metadata in etcd.get_prefix(prefix):
-        key = metadata.key.decode('utf-8').split('/')[-1]
+    for value, raw_key in iter_prefix(etcd, prefix):
+        key = raw_key.decode('utf-8').split('/')[-1]
         try:
-            data[key] = json.loads(value.decode('utf-8'))
+            data[key] = json_loads(value)
         except json.JSONDecodeError:
             log.warning(f"⚠️ Warning: Could not parse JSON for key {key} under {prefix}")
     return data
@@ -50,6 +94,14 @@ class SshError(RuntimeError):
 class RemoteCommandError(RuntimeError):
     pass
 
+# ssh/scp to the same worker share one master connection (opened by the first
+# session, kept for a while after the last one), so only one handshake per host
+SSH_MUX_OPTS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/cm-%r@%h:%p",
+    "-o", "ControlPersist=60s",
+]
+
 def run_ssh(
     *,
     ssh_username: str,
@@ -59,20 +111,26 @@ def run_ssh(
     check: bool = False,
     quiet: bool = False,
     timeout: int = 30,
+    connect_timeout: int = 8,
 ) -> subprocess.CompletedProcess:
     """
     Run: ssh -i <key> user@host <remote_args...>
 
+    connect_timeout bounds the ssh connection setup, timeout the remote
+    command once connected.
+
     - Raises SshError on SSH transport problems
     - Raises RemoteCommandError if check=True and remote command fails
     - Error messages are concise (only stderr summary)
+    - Output is captured as bytes; only the first stderr line is decoded
     """
     cmd = [
         "ssh",
         "-i", ssh_key_path,
         "-o", "BatchMode=yes",
         "-o", "StrictHostKeyChecking=no",
-        "-o", f"ConnectTimeout={timeout}",
+        "-o", f"ConnectTimeout={connect_timeout}",
+        *SSH_MUX_OPTS,
         f"{ssh_username}@{ssh_host}",
         "--",
         *remote_args,
@@ -81,28 +139,54 @@ def run_ssh(
     try:
         cp = subprocess.run(
             cmd,
-            text=True,
             stdout=(subprocess.DEVNULL if quiet else subprocess.PIPE),
             stderr=(subprocess.DEVNULL if quiet else subprocess.PIPE),
-            timeout=timeout + 5,
+            timeout=connect_timeout + timeout,
         )
     except subprocess.TimeoutExpired:
         raise SshError(f"SSH timeout connecting to {ssh_username}@{ssh_host}")
 
-    stderr = (cp.stderr or "").strip()
+    stderr = (cp.stderr or b"").strip().split(b"\n", 1)[0].decode("utf-8", "replace")
 
     # SSH transport failures are typically exit code 255
     if cp.returncode == 255:
-        msg = stderr.splitlines()[0] if stderr else "SSH transport error"
+        msg = stderr or "SSH transport error"
         raise SshError(msg)
 
     if check and cp.returncode != 0:
-        msg = stderr.splitlines()[0] if stderr else "Remote command failed"
+        msg = stderr or "Remote command failed"
         log.error(f"❌ {msg}")
         raise RemoteCommandError(msg)
 
     return cp
 
+@functools.lru_cache(maxsize=None)
+def docker_run_common_opts(
+    worker_bridge: str,
+    etcd_host: str,
+    etcd_port: int,
+    etcd_user: str = None,
+    etcd_password: str = None,
+    with_ca_cert: bool = False,
+) -> str:
+    """
+    Shell-quoted `docker run` options shared by all nodes on the same
+    bridge and etcd endpoint; built once per combination.
+    """
+    opts = [
+        "--net", worker_bridge,
+        "--privileged",
+        "--pull=always",
+        "-e", f"ETCD_ENDPOINT={etcd_host}:{etcd_port}",
+    ]
+    if etcd_user and etcd_password and with_ca_cert:
+        opts.extend([
+            "-e", f"ETCD_USER={etcd_user}",
+            "-e", f"ETCD_PASSWORD={etcd_password}",
+            "-e", f"ETCD_CA_CERT=/app/etcd-ca.crt",
+        ])
+    return shlex.join(opts)
+
 def recreate_and_run_container(
     *,
     node_name: str,
@@ -120,48 +204,18 @@ def recreate_and_run_container(
     etcd_user: str = None,
     etcd_password: str = None,
     etcd_ca_cert: str = None,
+    ssh_connect_timeout: int = 8,
 ) -> None:
 
     try:
-        # --- Check if container exists ---
-        ps = run_ssh(
-            ssh_username=ssh_username,
-            ssh_host=worker,
-            ssh_key_path=ssh_key_path,
-            remote_args=["docker", "ps", "-a", "--format", "{{.Names}}"],
-            check=True,  # if docker command fails, raise RemoteCommandError
-        )
-
-        names = ps.stdout.splitlines() if ps.stdout else []
-        exists = node_name in names
-
-        # --- Remove existing container (ignore errors, but still raise SSH transport errors) ---
-        if exists:
-            run_ssh(
-                ssh_username=ssh_username,
-                ssh_host=worker,
-                ssh_key_path=ssh_key_path,
-                remote_args=["docker", "rm", "-f", node_name],
-                check=False,   # ignore non-zero from docker rm
-                quiet=True,
-            )
         # --- Run new container ---
+        # Only the per-node fields are built here, the rest comes from the cached options
         run_cmd = [
                 "docker", "run", "-d",
                 "--name", node_name,
                 "--hostname", node_name,
-                "--net", worker_bridge,
-                "--privileged",
-                "--pull=always",
                 "-e", f"NODE_NAME={node_name}",
-                "-e", f"ETCD_ENDPOINT={etcd_host}:{etcd_port}"
         ]
-        if etcd_user and etcd_password and etcd_ca_cert:
-            run_cmd.extend([
-                "-e", f"ETCD_USER={etcd_user}",
-                "-e", f"ETCD_PASSWORD={etcd_password}",
-                "-e", f"ETCD_CA_CERT=/app/etcd-ca.crt",
-            ])
         if cpu_requested > 0:
             run_cmd.extend(["--cpu-shares", str(int(cpu_requested*1024))])  # convert CPU to CPU shares (1024 = 1 CPU)
         else:
@@ -172,51 +226,55 @@ def recreate_and_run_container(
              run_cmd.extend(["--cpus", str(cpu_limit)])
         if mem_limit != "0MiB":
              run_cmd.extend(["--memory", str(mem_limit)])
-        run_cmd.append(container_image) 
+        common_opts = docker_run_common_opts(
+            worker_bridge, etcd_host, etcd_port, etcd_user, etcd_password, bool(etcd_ca_cert)
+        )
 
-        run_ssh(
-            ssh_username=ssh_username,
-            ssh_host=worker,
-            ssh_key_path=ssh_key_path,
-            remote_args=run_cmd,
-            check=True,
+        # --- Remove any existing container (docker rm -f tolerates a missing one) ---
+        script = (
+            f"docker rm -f {shlex.quote(node_name)} >/dev/null 2>&1; "
+            f"{shlex.join(run_cmd)} {common_opts} {shlex.quote(container_image)}"
         )
 
-        # copy the CA cert if needed with scp and then and docker cp via ssh
+        # copy the CA cert if needed with scp, then docker cp it in the same ssh
+        # session as docker run (the agent waits for the file before connecting)
         if etcd_user and etcd_password and etcd_ca_cert:
             scp_cmd = [
                 "scp",
                 "-i", ssh_key_path,
                 "-o", "BatchMode=yes",
                 "-o", "StrictHostKeyChecking=no",
-                "-o", f"ConnectTimeout=30",
+                "-o", f"ConnectTimeout={ssh_connect_timeout}",
+                *SSH_MUX_OPTS,
                 etcd_ca_cert,
                 f"{ssh_username}@{worker}:/tmp/etcd-ca.crt",
             ]
             try:
                 cp = subprocess.run(
                     scp_cmd,
-                    text=True,
                     stdout=subprocess.DEVNULL,
                     stderr=subprocess.PIPE,
-                    timeout=35,
+                    timeout=ssh_connect_timeout + 30,
                 )
             except subprocess.TimeoutExpired:
                 raise SshError(f"SCP timeout connecting to {ssh_username}@{worker}")
             
-            stderr = (cp.stderr or "").strip()
+            stderr = (cp.stderr or b"").strip().split(b"\n", 1)[0].decode("utf-8", "replace")
             if cp.returncode != 0:
-                msg = stderr.splitlines()[0] if stderr else "SCP transport error"
+                msg = stderr or "SCP transport error"
                 raise SshError(msg)
             
-            # now copy into the container
-            run_ssh(
-                ssh_username=ssh_username,
-                ssh_host=worker,
-                ssh_key_path=ssh_key_path,
-                remote_args=["docker", "cp", "/tmp/etcd-ca.crt", f"{node_name}:/app/etcd-ca.crt"],
-                check=True,
-            )
+            script += f" && docker cp /tmp/etcd-ca.crt {shlex.quote(node_name + ':/app/etcd-ca.crt')}"
+
+        # --- Remove, run (and cp) in a single ssh session ---
+        run_ssh(
+            ssh_username=ssh_username,
+            ssh_host=worker,
+            ssh_key_path=ssh_key_path,
+            remote_args=["sh", "-c", shlex.quote(script)],
+            check=True,
+            connect_timeout=ssh_connect_timeout,
+        )
     except SshError as e:
         print(f"    ❌ SSH failure: {e}")
         raise RuntimeError({e})
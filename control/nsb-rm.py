@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 import argparse
 import os
+import re
 import logging
-import concurrent
+import concurrent.futures
 import etcd3
+import shlex
 import subprocess
 import json
 import sys
@@ -11,6 +13,12 @@ import sys
 logging.basicConfig(level="INFO", format="[%(levelname)s] %(message)s")
 log = logging.getLogger(__name__)
 
+# Max containers removed by one docker rm -f (one ssh session)
+RM_BATCH_SIZE = 100
+
+# Log prefix per node type, other types use the satellite one
+NODE_TYPE_ICONS = {"satellite": "🛰️", "user": "👤", "gateway": "📡"}
+
 # ==========================================
 # HELPERS
 # ==========================================
@@ -33,9 +41,9 @@ def get_prefix_data(etcd_client,prefix):
     """Helper to fetch and parse JSON data from Etcd prefixes."""
     data = {}
     for value, metadata in etcd_client.get_prefix(prefix):
-        key = metadata.key.decode('utf-8').split('/')[-1]
+        key = metadata.key.rpartition(b'/')[2].decode('utf-8')
         try:
-            data[key] = json.loads(value.decode('utf-8'))
+            data[key] = json.loads(value)  # accepts UTF-8 bytes, no decode copy
         except json.JSONDecodeError:
             log.warning(f"⚠️ Warning: Could not parse JSON for key {key} under {prefix}")
     return data
@@ -46,6 +54,14 @@ class SshError(RuntimeError):
 class RemoteCommandError(RuntimeError):
     pass
 
+# ssh sessions to the same worker share one master connection (opened by the
+# first session), so only one handshake per host; closed by close_ssh_masters()
+SSH_MUX_OPTS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/cm-%r@%h:%p",
+    "-o", "ControlPersist=60s",
+]
+
 def run_ssh(
     *,
     ssh_username: str,
@@ -62,6 +78,7 @@ def run_ssh(
     - Raises SshError on SSH transport problems
     - Raises RemoteCommandError if check=True and remote command fails
     - Error messages are concise (only stderr summary)
+    - Output is captured as bytes; only the first stderr line is decoded
     """
     cmd = [
         "ssh",
@@ -69,6 +86,7 @@ def run_ssh(
         "-o", "BatchMode=yes",
         "-o", "StrictHostKeyChecking=no",
         "-o", f"ConnectTimeout={timeout}",
+        *SSH_MUX_OPTS,
         f"{ssh_username}@{ssh_host}",
         "--",
         *remote_args,
@@ -77,7 +95,6 @@ def run_ssh(
     try:
         cp = subprocess.run(
             cmd,
-            text=True,
             stdout=(subprocess.DEVNULL if quiet else subprocess.PIPE),
             stderr=(subprocess.DEVNULL if quiet else subprocess.PIPE),
             timeout=timeout + 5,
@@ -85,58 +102,71 @@ def run_ssh(
     except subprocess.TimeoutExpired:
         raise SshError(f"SSH timeout connecting to {ssh_username}@{ssh_host}")
 
-    stderr = (cp.stderr or "").strip()
+    stderr = (cp.stderr or b"").strip().split(b"\n", 1)[0].decode("utf-8", "replace")
 
     # SSH transport failures are typically exit code 255
     if cp.returncode == 255:
-        msg = stderr.splitlines()[0] if stderr else "SSH transport error"
+        msg = stderr or "SSH transport error"
         raise SshError(msg)
 
     if check and cp.returncode != 0:
-        msg = stderr.splitlines()[0] if stderr else "Remote command failed"
+        msg = stderr or "Remote command failed"
         raise RemoteCommandError(msg)
 
     return cp
 
-def node_removal(ssh_user: str, ssh_host: str, ssh_key: str, name: str, worker: str)-> tuple[str, bool, str]:
-    try:
-            # ----------------------------------------
-            # Check if container exists
-            # ----------------------------------------
-        ps = run_ssh(
-                ssh_username=ssh_user,
-                ssh_host=ssh_host,
-                ssh_key_path=ssh_key,
-                remote_args=["docker", "ps", "-a", "--format", "{{.Names}}","|","grep","-Fxq", name],
-                check=True
-            )
-    except SshError as e:
-        msg = f"    ❌ SSH failure: {e}"
-        return name, False, msg
+def close_ssh_masters(targets) -> None:
+    """Ask the ssh master of each (ssh_user, ssh_host, ssh_key) to exit."""
+    for ssh_user, ssh_host, ssh_key in targets:
+        subprocess.run(
+            ["ssh", "-i", ssh_key, *SSH_MUX_OPTS, "-O", "exit", f"{ssh_user}@{ssh_host}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
 
-    except RemoteCommandError:
-        msg = f"   ⚠️  Container '{name}' does not exist. Skipping."
-        return name, True, msg
+def nodes_removal(ssh_user: str, ssh_host: str, ssh_key: str, names: list[str], worker: str)-> list[tuple[str, bool, str]]:
+    """
+    Remove a batch of containers of one worker with a single docker rm -f.
+    Returns one (name, success, message) per container.
+    """
     # ----------------------------------------
-    # Stop and Remove
+    # Stop and Remove in one round trip: docker rm -f prints the name of each
+    # removed container, and nothing (or "No such container") for absent ones
     # ----------------------------------------
     try:
         del_proc = run_ssh(
                 ssh_username=ssh_user,
                 ssh_host=ssh_host,
                 ssh_key_path=ssh_key,
-                remote_args=["docker", "rm", "-f", name],
-                check=True
+                remote_args=["docker", "rm", "-f", *(shlex.quote(name) for name in names)],
+                check=False
             )
     except SshError as e:
         msg = f"    ❌ SSH failure: {e}"
-        return name, False, msg
-    except RemoteCommandError as e:
-        msg = f"    ❌ Remote docker command failed: {e}"
-        return name, False, msg
-    
-    msg = f" Removed on {worker}"
-    return name, True, msg
+        return [(name, False, msg) for name in names]
+
+    removed = set((del_proc.stdout or b"").decode("utf-8", "replace").split())
+    # Errors are reported one per line and name the container
+    errors = (del_proc.stderr or b"").decode("utf-8", "replace").strip().splitlines()
+    # A failure naming no container (daemon down, permission denied, ...)
+    # must not be mistaken for absent containers
+    general_error = None
+    if del_proc.returncode != 0:
+        general_error = errors[0] if errors else f"docker rm exited with code {del_proc.returncode}"
+        log.error(f"❌ docker rm on {worker} failed: {general_error}")
+    results = []
+    for name in names:
+        pattern = re.compile(rf"(?<![\w.-]){re.escape(name)}(?![\w.-])")
+        error = next((line for line in errors if pattern.search(line)), None)
+        if name in removed:
+            results.append((name, True, f" Removed on {worker}"))
+        elif error is None and general_error is not None:
+            results.append((name, False, f"    ❌ Remote docker command failed: {general_error}"))
+        elif error is None or "No such container" in error:
+            results.append((name, True, f"   ⚠️  Container '{name}' does not exist. Skipping."))
+        else:
+            results.append((name, False, f"    ❌ Remote docker command failed: {error}"))
+    return results
 
 def main():
     parser = argparse.ArgumentParser(
@@ -179,6 +209,11 @@ def main():
         default=os.getenv("ETCD_CA_CERT", None ),
         help="Path to Etcd CA certificate (default: env ETCD_CA_CERT or None)",
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Compact the Etcd history after the cleanup to free the deleted revisions (expensive on a shared cluster).",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -204,16 +239,18 @@ def main():
     # ==========================================
     etcd_client = connect_etcd(args.etcd_host, args.etcd_port, args.etcd_user, args.etcd_password, args.etcd_ca_cert)
 
-    # Fetch all relevant configuration
-    workers = get_prefix_data(etcd_client, '/config/workers/')
-    all_nodes = get_prefix_data(etcd_client, '/config/nodes/')
-    all_nodes_filtered = {}
-    node_types = args.type.split(",")
+    # Fetch all relevant configuration, the two prefixes concurrently
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        workers_future = executor.submit(get_prefix_data, etcd_client, '/config/workers/')
+        nodes_future = executor.submit(get_prefix_data, etcd_client, '/config/nodes/')
+        workers = workers_future.result()
+        all_nodes = nodes_future.result()
+    node_types = set(args.type.split(","))
     if "any" in node_types:
         all_nodes_filtered = all_nodes
     else:
-        for node_type in node_types:
-            all_nodes_filtered = {name:node for name,node in all_nodes.items() if node.get("type","undefined") == node_type}
+        # Single pass; a node matches any of the listed types
+        all_nodes_filtered = {name:node for name,node in all_nodes.items() if node.get("type","undefined") in node_types}
 
     log.info(f"🔎 Found {len(all_nodes_filtered)} nodes, to remove.")
 
@@ -229,47 +266,64 @@ def main():
     ok = 0
     fail = 0
 
+    # Group containers by worker, one ssh session removes up to RM_BATCH_SIZE of them
+    names_by_worker: dict[str, list[str]] = {}
+    for name, node in all_nodes_filtered.items():
+        worker = node.get('worker')
+        # Validation: Does the host exist in config?
+        if worker not in workers:
+            log.warning(f"⚠️  Skipping {name}: Worker '{worker}' not found in /config/workers")
+            continue
+        names_by_worker.setdefault(worker, []).append(name)
+
+    # (ssh_user, ssh_host, ssh_key) resolved once per worker, key path expanded
+    worker_ssh = {
+        name: (w.get('ssh-user', 'ubuntu'), w.get('ip', name), os.path.expanduser(w.get('ssh-key', '~/.ssh/id_rsa')))
+        for name, w in workers.items()
+    }
+    # Check each key file once, before any ssh is started. Only a key set in
+    # /config/workers is required; a missing default key leaves ssh to fall
+    # back to ssh-agent or its default identities.
+    explicit_keys = {worker_ssh[worker][2] for worker in names_by_worker if 'ssh-key' in workers[worker]}
+    for ssh_key in {worker_ssh[worker][2] for worker in names_by_worker}:
+        if os.path.isfile(ssh_key):
+            continue
+        if ssh_key in explicit_keys:
+            log.error(f"❌ SSH key {ssh_key} not found. Aborting before removing any container.")
+            return 1
+        log.warning(f"⚠️  Default SSH key {ssh_key} not found, relying on ssh-agent or default identities.")
+
     with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads) as executor:
         futures = {}
-        for name, node in all_nodes_filtered.items():
-            worker = node.get('worker')
-            # Validation: Does the host exist in config?
-            if worker not in workers:
-                log.warning(f"⚠️  Skipping {name}: Worker '{worker}' not found in /config/workers")
-                continue
-            future = executor.submit(
-                node_removal,
-                ssh_user=workers.get(worker, {}).get('ssh-user', 'ubuntu'),
-                ssh_host=workers.get(worker, {}).get('ip', worker),
-                ssh_key=workers.get(worker, {}).get('ssh-key', '~/.ssh/id_rsa'),
-                name=name, worker=worker
-            )
-            futures[future] = name
+        for worker, names in names_by_worker.items():
+            ssh_user, ssh_host, ssh_key = worker_ssh[worker]
+            for i in range(0, len(names), RM_BATCH_SIZE):
+                batch = names[i:i + RM_BATCH_SIZE]
+                future = executor.submit(
+                    nodes_removal,
+                    ssh_user=ssh_user,
+                    ssh_host=ssh_host,
+                    ssh_key=ssh_key,
+                    names=batch, worker=worker
+                )
+                futures[future] = batch
         for fut in concurrent.futures.as_completed(futures):
-            name = futures[fut]
             try:
-                node_name, success, msg = fut.result()
+                results = fut.result()
             except Exception as e:
-                success = False
-                msg = f"❌ Unhandled exception: {e}"
-                node_name = name
-
-            # Print per-node result
-            if all_nodes_filtered[node_name].get("type","undefined") == "satellite":
-                prefix = "🛰️"
-            elif all_nodes_filtered[node_name].get("type","undefined") == "user":
-                prefix = "👤"
-            elif all_nodes_filtered[node_name].get("type","undefined") == "gateway":
-                prefix = "📡"
-            else:
-                prefix = "🛰️"
-            
-            log.info(f"{prefix} {node_name}: {msg}")
-
-            if success:
-                ok += 1
-            else:
-                fail += 1
+                results = [(name, False, f"❌ Unhandled exception: {e}") for name in futures[fut]]
+
+            for node_name, success, msg in results:
+                # Print per-node result
+                prefix = NODE_TYPE_ICONS.get(all_nodes_filtered[node_name].get("type"), "🛰️")
+                log.info(f"{prefix} {node_name}: {msg}")
+
+                if success:
+                    ok += 1
+                else:
+                    fail += 1
+
+    close_ssh_masters({worker_ssh[worker] for worker in names_by_worker})
 
     log.info("==============================")
     log.info(f"✅ Success: {ok}")
@@ -284,9 +338,23 @@ def main():
     # ==========================================
     log.info("🧼 Cleaning up Etcd entries...")
     prefixes = ["/config/nodes/", "/config/epoch-config", "/config/links/", "/config/run","/config/etchosts/", "/config/etchosts6/"]
-    for prefix in prefixes:
-        log.info(f"   ➞ Deleting keys with prefix {prefix} ...")
-        etcd_client.delete_prefix(prefix)
+    # All prefixes are range-deleted in a single transaction (one round trip)
+    _, responses = etcd_client.transaction(
+        compare=[],
+        success=[
+            etcd_client.transactions.delete(
+                prefix, range_end=etcd3.utils.increment_last_byte(etcd3.utils.to_bytes(prefix))
+            )
+            for prefix in prefixes
+        ],
+        failure=[],
+    )
+    for prefix, resp in zip(prefixes, responses):
+        log.info(f"   ➞ Deleted {resp.response_delete_range.deleted} keys with prefix {prefix}")
+    if args.compact:
+        revision = etcd_client.get_response("/config/nodes/").header.revision
+        log.info(f"   ➞ Compacting Etcd history up to revision {revision} ...")
+        etcd_client.compact(revision, physical=True)
     #cleanup workers' usage stats
     log.info(f"   ➞ Resetting workers' usage stats...")
     for name, worker_cfg in workers.items():
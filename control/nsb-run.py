@@ -11,6 +11,8 @@ Producer side (this script):
 import argparse
 import calendar
 import concurrent.futures
+import datetime
+import functools
 import glob
 import json
 import logging
@@ -27,6 +29,13 @@ from typing import Optional, Tuple, List, Dict
 import etcd3
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
+try:
+    # Optional: faster JSON for epoch files and the values pushed to etcd
+    # (orjson.dumps returns bytes, which etcd3 accepts like str)
+    from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:
+    json_loads = json.loads  # stdlib also accepts UTF-8 bytes
+    json_dumps = json.dumps
 
 logging.basicConfig(level="INFO", format="[%(levelname)s] %(message)s")
 log = logging.getLogger(__name__)
@@ -38,13 +47,29 @@ TIME_OFFSET: Optional[float] = None
 etcd_client = None
 writing_lock = threading.Lock()
 PARALLEL_WORKERS = 1
+# Last run of digits in an epoch file name (the epoch number)
+LAST_DIGITS_RE = re.compile(r"(\d+)\D*$")
+# Fixed-width ASCII fields of 'YYYY-MM-DDTHH:MM:SSZ'
+ISO_UTC_TIME_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})Z", re.ASCII)
+parsed_epochs: Dict[str, Tuple[int, dict]] = {}  # queued epoch filename -> (mtime_ns, decoded JSON)
+ETCD_TXN_MAX_OPS = 128  # etcd default --max-txn-ops
+# Keep the single client channel alive across epoch waits and loops
+ETCD_GRPC_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+EPOCH_CONFIG_KEY = "/config/epoch-config"
+last_epoch_config: Optional[dict] = None  # epoch-config as last written by this run
 
 # ==========================================
 # HELPERS
 # ==========================================
+@functools.lru_cache(maxsize=65536)
 def calculate_vni(ep1, ant1, ep2, ant2) -> int:
     """
     Generates a deterministic VNI based on endpoints and antennas.
+    Memoized: the same links recur across epochs.
     """
     # Sort endpoints to ensure A->B and B->A produce the same VNI
     if str(ep1) < str(ep2):
@@ -56,6 +81,13 @@ def calculate_vni(ep1, ant1, ep2, ant2) -> int:
     return (checksum % 16777215) + 1
 
 
+def txn_chunks(ops: List) -> List[List]:
+    """
+    Split transaction operations into chunks accepted by a single etcd Txn.
+    """
+    return [ops[i:i + ETCD_TXN_MAX_OPS] for i in range(0, len(ops), ETCD_TXN_MAX_OPS)]
+
+
 def smart_wait(target_virtual_time_str, filename: str, fixed_wait: int = -1) -> None:
     """
     Sleeps according to delta between consecutive epoch times (virtual time),
@@ -106,9 +138,10 @@ def connect_etcd(
                 user=etcd_user,
                 password=etcd_password,
                 ca_cert=etcd_ca_cert,
+                grpc_options=ETCD_GRPC_OPTIONS,
             )
         else:
-            client = etcd3.client(host=etcd_host, port=etcd_port)
+            client = etcd3.client(host=etcd_host, port=etcd_port, grpc_options=ETCD_GRPC_OPTIONS)
 
         client.status()  # Test connection
         return client
@@ -129,7 +162,7 @@ def load_epoch_dir_and_pattern_from_etcd() -> Tuple[str, str]:
         if not epoch_config_value:
             return default_dir, default_pattern
 
-        epoch_config = json.loads(epoch_config_value.decode("utf-8"))
+        epoch_config = json_loads(epoch_config_value)
         epoch_dir = epoch_config.get("epoch-dir", default_dir)
         file_pattern = epoch_config.get("file-pattern", default_pattern)
         return epoch_dir, file_pattern
@@ -139,6 +172,17 @@ def load_epoch_dir_and_pattern_from_etcd() -> Tuple[str, str]:
         return default_dir, default_pattern
 
 
+def current_epoch_config() -> dict:
+    """
+    Returns a copy of /config/epoch-config. Only the first epoch reads it
+    from Etcd, later ones start from the value this run last wrote.
+    """
+    if last_epoch_config is not None:
+        return dict(last_epoch_config)
+    epoch_config_value = etcd_client.get(EPOCH_CONFIG_KEY)[0]
+    return json_loads(epoch_config_value) if epoch_config_value else {}
+
+
 def list_epoch_files(epoch_dir: str, file_pattern: str) -> List[str]:
     if not epoch_dir or not file_pattern:
         return []
@@ -150,9 +194,8 @@ def list_epoch_files(epoch_dir: str, file_pattern: str) -> List[str]:
         Extracts the last contiguous sequence of digits from the filename
         and returns it as an integer. If no digits are found, returns -1.
         """
-        basename = os.path.basename(path)
-        matches = re.findall(r"(\d+)", basename)
-        return int(matches[-1]) if matches else -1
+        match = LAST_DIGITS_RE.search(os.path.basename(path))
+        return int(match.group(1)) if match else -1
 
     files = sorted(glob.glob(search_path), key=last_numeric_suffix)
     return files
@@ -164,6 +207,13 @@ def convert_time_epoch_to_timestamp(time_str: str) -> float:
     to a Unix timestamp (seconds since epoch).
     """
     try:
+        # Fast path: only strictly formatted strings skip time.strptime
+        match = ISO_UTC_TIME_RE.fullmatch(time_str)
+        if match:
+            try:
+                return datetime.datetime(*map(int, match.groups()), tzinfo=datetime.timezone.utc).timestamp()
+            except ValueError:
+                pass  # e.g. a leap second, left to strptime
         struct_time = time.strptime(time_str, "%Y-%m-%dT%H:%M:%SZ")
         return calendar.timegm(struct_time)  # UTC-safe
     except ValueError:
@@ -257,8 +307,17 @@ def process_epoch_from_queue(json_path: str) -> None:
     """
     Reads an epoch file and applies updates into etcd.
     """
-    with open(json_path, "r", encoding="utf-8") as f:
-        epoch_dict = json.load(f)
+    global last_epoch_config
+    # Epochs enqueued by process_epoch_from_file were already decoded there.
+    # The queued copy keeps the source mtime (copy2), a different one means
+    # the file changed after it was parsed.
+    cached = parsed_epochs.pop(os.path.basename(json_path), None)
+    epoch_dict = None
+    if cached is not None and cached[0] == os.stat(json_path).st_mtime_ns:
+        epoch_dict = cached[1]
+    if epoch_dict is None:
+        with open(json_path, "rb") as f:
+            epoch_dict = json_loads(f.read())
 
     allowed_keys = [
         "time",
@@ -268,11 +327,10 @@ def process_epoch_from_queue(json_path: str) -> None:
         "run"
     ]
 
-    # get epoch-config from etcd to ensure we have the latest epoch-dir/pattern and to sanity check the epoch-time key exists (if not, we can fallback to time or just log it as unknown)
-    epoch_config_value = etcd_client.get("/config/epoch-config")[0]
-    if epoch_config_value:
-        log.debug(f"📖 Loaded epoch configuration from Etcd: {epoch_config_value}")
-    epoc_config = json.loads(epoch_config_value.decode("utf-8")) if epoch_config_value else {}
+    # Latest epoch-config, read from Etcd only for the first epoch of the run
+    epoc_config = current_epoch_config()
+    if epoc_config:
+        log.debug(f"📖 Loaded epoch configuration: {epoc_config}")
     # A. Push epoch-time and sanity check
     for key, value in epoch_dict.items():
         if key not in allowed_keys:
@@ -284,114 +342,150 @@ def process_epoch_from_queue(json_path: str) -> None:
             epoc_config["epoch-time"] = value
     
     epoc_config["epoch-file"] = json_path.split("/")[-1]
-    etcd_client.put("/config/epoch-config", json.dumps(epoc_config))
+    etcd_client.put(EPOCH_CONFIG_KEY, json_dumps(epoc_config))
+    last_epoch_config = epoc_config
 
     # B. Push Dynamic Actions
     add = epoch_dict.get("links-add", [])
     delete = epoch_dict.get("links-del", [])
     update = epoch_dict.get("links-update", [])
 
-    def apply_link_add(l: Dict) -> None:
-        ep2_antenna = 1
-        ep1_antenna = 1
+    ep1_antenna = ep2_antenna = 1
+
+    def link_keys(l: Dict) -> Tuple[str, str]:
         vxlan_iface_name1 = f"vl_{l['endpoint2']}_{ep2_antenna}"
         vxlan_iface_name2 = f"vl_{l['endpoint1']}_{ep1_antenna}"
         etcd_key1 = f"/config/links/{l['endpoint1']}/{vxlan_iface_name1}"
         etcd_key2 = f"/config/links/{l['endpoint2']}/{vxlan_iface_name2}"
+        return etcd_key1, etcd_key2
 
-        vni = calculate_vni(l["endpoint1"], ep1_antenna, l["endpoint2"], ep2_antenna)
-        l["vni"] = vni
-        log.debug(
-            f"🛜  [{os.path.basename(json_path)}] Syncing link-add "
-            f"{l['endpoint1']} - {l['endpoint2']} with VNI {vni}"
-        )
-
-        etcd_client.put(etcd_key1, json.dumps(l))
-        etcd_client.put(etcd_key2, json.dumps(l))
+    def link_vni(l: Dict) -> int:
+        # Epoch generators may ship the VNI already; compute it only when missing
+        return l.get("vni") or calculate_vni(l["endpoint1"], ep1_antenna, l["endpoint2"], ep2_antenna)
 
-    def apply_link_delete(l: Dict) -> None:
-        ep2_antenna = 1
-        ep1_antenna = 1
-        vxlan_iface_name1 = f"vl_{l['endpoint2']}_{ep2_antenna}"
-        vxlan_iface_name2 = f"vl_{l['endpoint1']}_{ep1_antenna}"
-        etcd_key1 = f"/config/links/{l['endpoint1']}/{vxlan_iface_name1}"
-        etcd_key2 = f"/config/links/{l['endpoint2']}/{vxlan_iface_name2}"
+    def execute_items(items: List, fn) -> List:
+        if not items:
+            return []
+        if PARALLEL_WORKERS <= 1 or len(items) == 1:
+            return [fn(item) for item in items]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=PARALLEL_WORKERS) as pool:
+            futures = [pool.submit(fn, item) for item in items]
+            return [fut.result() for fut in concurrent.futures.as_completed(futures)]
 
-        vni = calculate_vni(l["endpoint1"], ep1_antenna, l["endpoint2"], ep2_antenna)
-        log.debug(
-            f"✂️  [{os.path.basename(json_path)}] Syncing link-del "
-            f"{l['endpoint1']} - {l['endpoint2']} (VNI {vni})"
-        )
+    def commit(ops: List) -> None:
+        etcd_client.transaction(compare=[], success=ops, failure=[])
 
-        etcd_client.delete(etcd_key1)
-        etcd_client.delete(etcd_key2)
+    # Each phase is written with batched transactions (one Raft commit per
+    # ETCD_TXN_MAX_OPS keys). Keys are deduplicated per phase, the last
+    # entry wins as it did with sequential puts.
+    def put_all(kv: Dict[str, str]) -> None:
+        execute_items(txn_chunks([etcd_client.transactions.put(k, v) for k, v in kv.items()]), commit)
 
-    def apply_link_update(l: Dict) -> None:
-        ep2_antenna = 1
-        ep1_antenna = 1
-        vxlan_iface_name1 = f"vl_{l['endpoint2']}_{ep2_antenna}"
-        vxlan_iface_name2 = f"vl_{l['endpoint1']}_{ep1_antenna}"
-        etcd_key1 = f"/config/links/{l['endpoint1']}/{vxlan_iface_name1}"
-        etcd_key2 = f"/config/links/{l['endpoint2']}/{vxlan_iface_name2}"
+    def delete_all(keys: Dict[str, None]) -> None:
+        execute_items(txn_chunks([etcd_client.transactions.delete(k) for k in keys]), commit)
 
-        # Sanity check: ensure the link exists before updating
-        etcd_value1, _ = etcd_client.get(etcd_key1)
-        etcd_value2, _ = etcd_client.get(etcd_key2)
-        if not etcd_value1 or not etcd_value2:
+    def existing_in_chunk(chunk: List[str]) -> set:
+        _, responses = etcd_client.transaction(
+            compare=[],
+            success=[etcd_client.transactions.get(k) for k in chunk],
+            failure=[],
+        )
+        return {k for k, kvs in zip(chunk, responses) if kvs}
+
+    def existing_keys(keys: List[str]) -> set:
+        unique = list(dict.fromkeys(keys))
+        if len(unique) > ETCD_TXN_MAX_OPS:
+            # More than one transaction of gets: a single keys-only scan is cheaper
+            scanned = {meta.key.decode() for _, meta in etcd_client.get_prefix("/config/links/", keys_only=True)}
+            return scanned.intersection(unique)
+        # Read-only chunks are independent, they run on the same worker pool
+        return set().union(*execute_items(txn_chunks(unique), existing_in_chunk))
+
+    # One pass over every link entry: keys and VNI are computed once per
+    # link and debug lines are only formatted when debug logging is on.
+    epoch_name = os.path.basename(json_path)
+    debug = log.isEnabledFor(logging.DEBUG)
+    link_log = {
+        "add": "🛜  [{}] Syncing link-add {} - {} with VNI {}",
+        "del": "✂️  [{}] Syncing link-del {} - {} (VNI {})",
+        "update": "♻️  [{}] Syncing link-update {} - {} (VNI {})",
+    }
+    add_puts: Dict[str, str] = {}
+    del_keys: Dict[str, None] = {}
+    update_links = []
+    for op, items in (("add", add), ("del", delete), ("update", update)):
+        for l in items:
+            etcd_key1, etcd_key2 = link_keys(l)
+            if op == "update":
+                # logged once the link is known to exist
+                update_links.append((l, etcd_key1, etcd_key2))
+                continue
+            if op == "add":
+                l["vni"] = link_vni(l)
+                add_puts[etcd_key1] = add_puts[etcd_key2] = json_dumps(l)
+            else:
+                # Deletes only need the keys, the VNI is just for the debug line
+                del_keys[etcd_key1] = del_keys[etcd_key2] = None
+            if debug:
+                log.debug(link_log[op].format(epoch_name, l["endpoint1"], l["endpoint2"], link_vni(l)))
+    put_all(add_puts)
+    delete_all(del_keys)
+
+    # Sanity check: ensure the link exists before updating (after adds/deletes, as before)
+    found = existing_keys([k for _, etcd_key1, etcd_key2 in update_links for k in (etcd_key1, etcd_key2)])
+    update_puts: Dict[str, str] = {}
+    for l, etcd_key1, etcd_key2 in update_links:
+        if etcd_key1 not in found or etcd_key2 not in found:
             log.warning(
-                f"⚠️  [{os.path.basename(json_path)}] Link not found in Etcd for "
+                f"⚠️  [{epoch_name}] Link not found in Etcd for "
                 f"{l['endpoint1']} - {l['endpoint2']}. Skipping update."
             )
-            return
-
-        vni = calculate_vni(l["endpoint1"], ep1_antenna, l["endpoint2"], ep2_antenna)
-        l["vni"] = vni
-
-        log.debug(
-            f"♻️  [{os.path.basename(json_path)}] Syncing link-update "
-            f"{l['endpoint1']} - {l['endpoint2']} (VNI {vni})"
-        )
-        etcd_client.put(etcd_key1, json.dumps(l))
-        etcd_client.put(etcd_key2, json.dumps(l))
+            continue
+        l["vni"] = vni = link_vni(l)
+        if debug:
+            log.debug(link_log["update"].format(epoch_name, l["endpoint1"], l["endpoint2"], vni))
+        update_puts[etcd_key1] = update_puts[etcd_key2] = json_dumps(l)
+    put_all(update_puts)
 
-    def apply_run_cmd(node_and_cmds: Tuple[str, List]) -> None:
-        node, cmds = node_and_cmds
+    # D. Push Runtime Commands
+    run_puts: Dict[str, str] = {}
+    for node, cmds in epoch_dict.get("run", {}).items():
         log.debug(
             f"▶️  [{os.path.basename(json_path)}] Pushing run commands to node {node}: {cmds}"
         )
-        etcd_client.put(f"/config/run/{node}", json.dumps(cmds))
-
-    def execute_items(items: List, fn) -> None:
-        if not items:
-            return
-        if PARALLEL_WORKERS <= 1 or len(items) == 1:
-            for item in items:
-                fn(item)
-            return
-        with concurrent.futures.ThreadPoolExecutor(max_workers=PARALLEL_WORKERS) as pool:
-            futures = [pool.submit(fn, item) for item in items]
-            for fut in concurrent.futures.as_completed(futures):
-                fut.result()
+        run_puts[f"/config/run/{node}"] = json_dumps(cmds)
+    put_all(run_puts)
 
-    execute_items(add, apply_link_add)
-    execute_items(delete, apply_link_delete)
-    execute_items(update, apply_link_update)
+    log.info(f"✅ [{os.path.basename(json_path)}] Epoch applied successfully.")
 
-    # D. Push Runtime Commands
-    execute_items(list(epoch_dict.get("run", {}).items()), apply_run_cmd)
 
-    log.info(f"✅ [{os.path.basename(json_path)}] Epoch applied successfully.")
+def load_epoch_file(json_path: str) -> Tuple[int, dict]:
+    """
+    Reads and parses an epoch file from epoch_dir.
+    Returns (mtime_ns, config), the mtime being that of the content parsed.
+    """
+    with open(json_path, "rb") as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        return mtime_ns, json_loads(f.read())
 
 
-def process_epoch_from_file(json_path: str, queue_path: str, fixed_wait: int = -1) -> None:
+def process_epoch_from_file(
+    json_path: str,
+    queue_path: str,
+    fixed_wait: int = -1,
+    prefetched: Optional[concurrent.futures.Future] = None,
+) -> None:
     """
     Reads an epoch file from epoch_dir, waits according to epoch time, then enqueues it
     into epoch-queue using atomic publish.
+    If prefetched is given, the parsed configuration is taken from that future.
     """
     filename = os.path.basename(json_path)
     try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
+        if prefetched is not None:
+            mtime_ns, config = prefetched.result()
+        else:
+            mtime_ns, config = load_epoch_file(json_path)
 
         # WAIT FOR SCHEDULED TIME (virtual -> real time sync)
         epoch_time = config.get("epoch-time")
@@ -404,7 +498,13 @@ def process_epoch_from_file(json_path: str, queue_path: str, fixed_wait: int = -
         log.info(f"🚩 Applying epoch configuration {filename}...")
 
         with writing_lock:
-            atomic_enqueue(json_path, queue_path)
+            parsed_epochs[filename] = (mtime_ns, config)
+            try:
+                atomic_enqueue(json_path, queue_path)
+            except Exception:
+                # Not queued, so never consumed: do not leave it cached
+                parsed_epochs.pop(filename, None)
+                raise
 
     except Exception as e:
         log.error(f"❌ Error processing {filename}: {e}")
@@ -429,7 +529,7 @@ def run_all_epochs(
     if resume:
         log.info("🔄 Resume emulation from state in Etcd...")
         cfg_val, _ = etcd_client.get(f"/config/epoch-config")
-        cfg = json.loads(cfg_val.decode())
+        cfg = json_loads(cfg_val)
         if "epoch-file" in cfg:
             last_epoch = os.path.join(epoch_dir, cfg["epoch-file"])
             log.info(f"🔍 Last applied epoch according to Etcd: {last_epoch}")
@@ -440,9 +540,17 @@ def run_all_epochs(
             else:
                 log.warning(f"⚠️ Last applied epoch {last_epoch} not found in current epoch list. Restarting from the beginning.")
                 exit(1)
+    # a single reader thread parses the next epoch file while the current one waits
+    reader = concurrent.futures.ThreadPoolExecutor(max_workers=1)
     while True:
-        for f in files:
-            process_epoch_from_file(json_path=f, queue_path=queue_path, fixed_wait=fixed_wait)
+        pending = reader.submit(load_epoch_file, files[0])
+        for i, f in enumerate(files):
+            current = pending
+            if i + 1 < len(files):
+                pending = reader.submit(load_epoch_file, files[i + 1])
+            process_epoch_from_file(
+                json_path=f, queue_path=queue_path, fixed_wait=fixed_wait, prefetched=current
+            )
 
         if loop_delay is not None:
             log.info(f"🔄 Looping emulation after {loop_delay} seconds...")
@@ -452,6 +560,7 @@ def run_all_epochs(
             # brief pause before exiting to allow final epoch processing
             time.sleep(30)
             break
+    reader.shutdown(wait=False)
     return 0
 
 
@@ -541,13 +650,14 @@ def main() -> int:
     )
 
     # Prelimiary check nodes exists. Any /config/nodes/* key is a json file that should contain the key "eth0_ip"" 
-    nodes = etcd_client.get_prefix("/config/nodes/")
-    if not any(nodes):
+    # Materialized once: any() on the generator would consume the first node
+    nodes = list(etcd_client.get_prefix("/config/nodes/"))
+    if not nodes:
         log.error("❌ No nodes found in Etcd under /config/nodes/. Ensure satellite system is running and configured correctly.")
         return 1
     for value, metadata in nodes:
         try:
-            node_config = json.loads(value.decode("utf-8"))
+            node_config = json_loads(value)
             if "eth0_ip" not in node_config:
                 log.error(f"❌ Node config at {metadata.key.decode('utf-8')} is missing 'eth0_ip'. Ensure satellite system is running correctly.")
                 return 1
@@ -25,7 +25,7 @@ if [ -z "$IF" ] || [ -z "$DST" ] || [ -z "$MET" ]; then
 fi
 
 # Check interface exists
-if ! ip link show "$IF" >/dev/null 2>&1; then
+if [ ! -e "/sys/class/net/$IF" ]; then
     echo "Interface $IF does not exist"
     exit 1
 fi
@@ -4,6 +4,7 @@ import etcd3
 import json
 import ipaddress
 import hashlib
+import functools
 from pathlib import Path
 import subprocess
 from typing import Mapping, Optional
@@ -13,13 +14,21 @@ from extra.routing.rutils import replace_placeholders_in_file
 #   HELPERS
 # ----------------------------
 
+# Per-link vtysh arguments that do not depend on the interface, built once
+LINK_ADD_VTYSH_ARGS = (
+    "-c", "ip router isis CORE",
+    "-c", "isis network point-to-point",
+    "-c", "end",
+)
+
+@functools.lru_cache(maxsize=1024)
 def derive_sysid_from_string(value: str) -> str:
     """
     Derive an 8-digit IS-IS system-id from an arbitrary string
     using a cryptographic hash (deterministic, stable).
     """
-    digest = hashlib.sha256(value.encode("utf-8")).digest()
-    num = int.from_bytes(digest[:4], byteorder="big")  # 32 bits
+    digest = hashlib.blake2s(value.encode("utf-8"), digest_size=4).digest()
+    num = int.from_bytes(digest, byteorder="big")  # 32 bits
     return f"{num % 10**8:08d}"
 
 def pick_last_usable_ip(net: ipaddress._BaseNetwork):
@@ -44,7 +53,7 @@ def pick_last_usable_ip(net: ipaddress._BaseNetwork):
 def init(etcd_client, node_name) -> tuple[str, bool]:
     try:
         val, _ = etcd_client.get(f"/config/nodes/{node_name}")
-        my_config = json.loads(val.decode())
+        my_config = json.loads(val)
         l3_config = my_config.get("L3-config", {})
         if "cidr" not in l3_config:
             msg=f"  ❌ IS-IS configuration failed: No CIDR assigned to node."
@@ -106,14 +115,7 @@ def init(etcd_client, node_name) -> tuple[str, bool]:
         return msg, False 
 
 def link_add(etcd_client, node_name, interface) -> tuple[str, bool]:
-    cmd = [
-            "vtysh",
-            "-c", "conf t",
-            "-c", f"interface {interface}",
-            "-c", "ip router isis CORE",
-            "-c", "isis network point-to-point",
-            "-c", "end"
-    ]
+    cmd = ["vtysh", "-c", "conf t", "-c", f"interface {interface}", *LINK_ADD_VTYSH_ARGS]
     try:
         subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         return f"  ✅ IS-IS enabled on {interface}", True 
@@ -3,6 +3,7 @@ import time
 import json
 import ipaddress
 import hashlib
+import functools
 import subprocess
 from extra.routing.rutils import replace_placeholders_in_file
 
@@ -11,10 +12,18 @@ from extra.routing.rutils import replace_placeholders_in_file
 #   HELPERS
 # ----------------------------
 
+# Per-link vtysh arguments that do not depend on the interface, built once
+LINK_ADD_VTYSH_ARGS = (
+    "-c", "ipv6 router isis CORE",
+    "-c", "isis network point-to-point",
+    "-c", "end",
+)
+
+@functools.lru_cache(maxsize=1024)
 def derive_sysid_from_string(value: str) -> str:
     """Deterministically derive an 8-digit IS-IS system-id from an arbitrary string."""
-    digest = hashlib.sha256(value.encode("utf-8")).digest()
-    num = int.from_bytes(digest[:4], byteorder="big")  # 32 bits
+    digest = hashlib.blake2s(value.encode("utf-8"), digest_size=4).digest()
+    num = int.from_bytes(digest, byteorder="big")  # 32 bits
     return f"{num % 10**8:08d}"
 
 
@@ -51,7 +60,7 @@ def init(etcd_client, node_name) -> tuple[str, bool]:
     """Initialize IPv6-only IS-IS in FRR."""
     try:
         val, _ = etcd_client.get(f"/config/nodes/{node_name}")
-        my_config = json.loads(val.decode())
+        my_config = json.loads(val)
         l3_config = my_config.get("L3-config", {})
 
         # sat-agent uses `cidr-v6`
@@ -131,14 +140,7 @@ def init(etcd_client, node_name) -> tuple[str, bool]:
 
 def link_add(etcd_client, node_name, interface) -> tuple[str, bool]:
     """Enable IS-IS IPv6 address-family on an interface."""
-    cmd = [
-        "vtysh",
-        "-c", "conf t",
-        "-c", f"interface {interface}",
-        "-c", "ipv6 router isis CORE",
-        "-c", "isis network point-to-point",
-        "-c", "end",
-    ]
+    cmd = ["vtysh", "-c", "conf t", "-c", f"interface {interface}", *LINK_ADD_VTYSH_ARGS]
     try:
         subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         return f"  ✅ IS-ISv6 enabled on {interface}", True
@@ -138,7 +138,7 @@ def refresh_hosts_ipv6_cache() -> None:
 def init(etcd_client, node_name) -> tuple[str, bool]:
     try:
         val, _ = etcd_client.get(f"/config/nodes/{node_name}")
-        my_config = json.loads(val.decode())
+        my_config = json.loads(val)
         l3_config = my_config.get("L3-config", {})
         if "cidr-v6" not in l3_config:
             msg=f" ❌ Configuration failed: No CIDR v6 assigned to node."
@@ -6,10 +6,28 @@ import time
 import logging
 import subprocess
 import etcd3
+import grpc
 import threading
+import queue
+import signal
 import sys
-import re
 import hashlib
+import functools
+import fcntl
+import socket
+import struct
+import errno
+try:
+    # Optional: netlink fast path for VXLAN links; falls back to `ip -batch`
+    from pyroute2 import IPRoute
+    from pyroute2.netlink.exceptions import NetlinkError
+except ImportError:
+    IPRoute = None
+try:
+    # Optional: faster JSON decoding on the watch/topology paths
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads  # stdlib also accepts UTF-8 bytes
 
 # ----------------------------
 #   CONFIGURATION
@@ -39,34 +57,138 @@ log = logging.getLogger(__name__)
 l3_flags = None
 my_config = None
 etcd_client = None
+ETCD_CLIENT_LOCK = threading.Lock()
+RETRY_BACKOFF_BASE_S = 0.1
+RETRY_BACKOFF_CAP_S = 3.2
 routing = None
 HOSTS_LOCK = threading.Lock()
+hosts_base = None       # /etc/hosts content not managed by the agent, read once
+hosts_managed = set()   # node names whose lines were taken over from hosts_base
+hosts_entries = {}      # node_name -> ip written by the agent
+SHUTDOWN = threading.Event()
 VXLAN_OVERHEAD_BYTES = 50
+LINK_EVENT_DEBOUNCE_S = 0.05
+pending_link_events = {}  # vxlan_if -> (first pending delete or None, latest event)
+pending_link_lock = threading.Lock()
+pending_link_timer = None
+link_work = {}  # vxlan_if -> events queued for its running link worker
+link_work_lock = threading.Lock()
+running_batches = set()  # Popen objects of command batches still running
+running_batches_lock = threading.Lock()
+COMMAND_REAP_INTERVAL_S = 1.0  # how often the main thread reaps finished batches
+# netem option -> tc keywords preceding its value, in tc argument order
+NETEM_KEYWORDS = (
+    ("rate", ("rate",)),
+    ("delay", ("delay",)),
+    ("loss", ("loss", "random")),
+    ("limit", ("limit",)),
+)
+SIOCGIFADDR = 0x8915
+SIOCGIFMTU = 0x8921
 vxlan_link_mtu = None
+vxlan_v4_addr = None  # "<last usable v4>/32" assigned to every VXLAN link
+vxlan_v6_ip = None
+remote_ips = {}  # node_name -> eth0_ip
+ETCD_TXN_MAX_OPS = 128  # etcd default --max-txn-ops
+ipr = None  # pyroute2 IPRoute socket, when pyroute2 is available
+eth0_index = None  # ifindex of the VXLAN underlay device, looked up once
+IPR_LOCK = threading.Lock()
 
 # ----------------------------
 #   Helpers
 # ----------------------------
-def get_etcd_client():
-    log.info(f"📁 Connecting to Etcd at {ETCD_HOST}:{ETCD_PORT}...")
-    while True:
-        try:
-            if ETCD_USER and ETCD_PASSWORD:
-                etcd_client = etcd3.client(host=ETCD_HOST, port=ETCD_PORT, user=ETCD_USER, password=ETCD_PASSWORD, ca_cert=ETCD_CA_CERT)
-            else:
-                etcd_client = etcd3.client(host=ETCD_HOST, port=ETCD_PORT)
-            etcd_client.status()  # Test connection, if fail will raise
-            log.info(f" ✅ Connected to Etcd at {ETCD_HOST}:{ETCD_PORT}.")
+def get_etcd_client(force_reconnect=False):
+    """
+    Return the process-wide Etcd client, connecting on first use.
+    With force_reconnect the current client is closed and a new channel
+    is opened (see needs_reconnect); otherwise the channel is reused.
+    """
+    global etcd_client
+    with ETCD_CLIENT_LOCK:
+        if etcd_client is not None and not force_reconnect:
             return etcd_client
-        except:
-            time.sleep(5)
+        if etcd_client is not None:
+            try:
+                etcd_client.close()
+            except Exception:
+                pass
+            etcd_client = None
+        log.info(f"📁 Connecting to Etcd at {ETCD_HOST}:{ETCD_PORT}...")
+        attempt = 0
+        while True:
+            try:
+                if ETCD_USER and ETCD_PASSWORD:
+                    client = etcd3.client(host=ETCD_HOST, port=ETCD_PORT, user=ETCD_USER, password=ETCD_PASSWORD, ca_cert=ETCD_CA_CERT)
+                else:
+                    client = etcd3.client(host=ETCD_HOST, port=ETCD_PORT)
+                client.status()  # Test connection, if fail will raise
+                log.info(f" ✅ Connected to Etcd at {ETCD_HOST}:{ETCD_PORT}.")
+                etcd_client = client
+                return etcd_client
+            except:
+                # A stop signal must not be held up by an unreachable Etcd
+                if SHUTDOWN.wait(retry_backoff(attempt)):
+                    log.info("🛑 Shutdown requested while connecting to Etcd.")
+                    sys.exit(0)
+                attempt += 1
+
+def retry_backoff(attempt: int) -> float:
+    """Exponential retry delay: 0.1s, 0.2s, ... capped at RETRY_BACKOFF_CAP_S."""
+    return min(RETRY_BACKOFF_CAP_S, RETRY_BACKOFF_BASE_S * 2 ** min(attempt, 16))
+
+def needs_reconnect(err) -> bool:
+    """
+    True for errors a gRPC channel does not recover from by itself: a
+    closed channel or an expired/invalid auth token (the token is only
+    obtained when the client is created). Transient errors such as
+    UNAVAILABLE are retried on the same channel.
+    """
+    if isinstance(err, ValueError):  # "Cannot invoke RPC on closed channel!"
+        return True
+    if not isinstance(err, grpc.RpcError):
+        return False
+    code = err.code()
+    return code == grpc.StatusCode.UNAUTHENTICATED or (
+        code == grpc.StatusCode.INVALID_ARGUMENT and "auth token" in (err.details() or "")
+    )
 
-def get_remote_ip(etcd_client, node_name):
-    val, _ = etcd_client.get(f"/config/nodes/{node_name}")
-    if val:
-        try: return json.loads(val.decode()).get("eth0_ip")
-        except: pass
-    return None
+def get_remote_ips(etcd_client) -> dict:
+    """
+    Fetch the eth0_ip of every registered node with a single range read.
+    """
+    ips = {}
+    for value, meta in etcd_client.get_prefix("/config/nodes/"):
+        try: ip = json_loads(value).get("eth0_ip")
+        except: continue
+        if ip:
+            ips[key_leaf(meta.key)] = ip
+    return ips
+
+def lookup_remote_ips(etcd_client, *names):
+    """
+    Return the node IPs from the local cache. All misses are fetched
+    together with Etcd transactions (one round trip per ETCD_TXN_MAX_OPS
+    names instead of one Get per name).
+    """
+    missing = [n for n in dict.fromkeys(names) if n and not remote_ips.get(n)]
+    for i in range(0, len(missing), ETCD_TXN_MAX_OPS):
+        chunk = missing[i:i + ETCD_TXN_MAX_OPS]
+        _, responses = etcd_client.transaction(
+            compare=[],
+            success=[etcd_client.transactions.get(f"/config/nodes/{n}") for n in chunk],
+            failure=[],
+        )
+        for n, kvs in zip(chunk, responses):
+            for value, _ in kvs:
+                try: ip = json_loads(value).get("eth0_ip")
+                except: continue
+                if ip:
+                    remote_ips[n] = ip
+    return tuple(remote_ips.get(n) for n in names)
+
+def key_leaf(key: bytes) -> str:
+    """Last path segment of an Etcd key (node or interface name)."""
+    return key.rsplit(b"/", 1)[-1].decode()
 
 def run(cmd, log_errors=True):
     result = subprocess.run(cmd, capture_output=True, text=True)
@@ -75,14 +197,76 @@ def run(cmd, log_errors=True):
         log.warning(result.stderr.strip())
     return result
 
+def run_batch(tool, cmds, log_errors=True):
+    """
+    Run several `ip`/`tc` commands in one process through `<tool> -batch -`.
+    Each entry of `cmds` is an argument list without the tool name; -force
+    keeps executing the following lines when one of them fails.
+    """
+    script = "".join(" ".join(cmd) + "\n" for cmd in cmds)
+    result = subprocess.run([tool, "-force", "-batch", "-"], input=script, capture_output=True, text=True)
+    if result.returncode != 0 and log_errors:
+        log.warning(f"⚠️ Batch failed: {tool} -batch with {len(cmds)} command(s)")
+        log.warning(result.stderr.strip())
+    return result
+
+def batch_errors(stderr: str) -> dict:
+    """
+    Map each failed line (1-based) of a `<tool> -batch -` script to its
+    error message; iproute2 reports them as "Command failed -:<line>".
+    """
+    errors, msg = {}, []
+    for line in stderr.splitlines():
+        if line.startswith("Command failed -:"):
+            errors[int(line.rsplit(":", 1)[1])] = " ".join(msg)
+            msg = []
+        elif line.strip():
+            msg.append(line.strip())
+    return errors
+
 def get_iface_mtu(ifname: str) -> int | None:
-    result = run(["ip", "link", "show", "dev", ifname], log_errors=False)
-    if result.returncode != 0:
+    """
+    Return the MTU of `ifname` via the SIOCGIFMTU ioctl, without spawning `ip`.
+    """
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        ifreq = fcntl.ioctl(s.fileno(), SIOCGIFMTU, struct.pack("256s", ifname.encode()[:15]))
+        return struct.unpack_from("i", ifreq, 16)[0]
+    except OSError:
         return None
-    match = re.search(r"\bmtu\s+(\d+)\b", result.stdout)
-    if not match:
+    finally:
+        s.close()
+
+def get_iface_ipv4(ifname: str) -> str | None:
+    """
+    Return the primary IPv4 address of `ifname` via the SIOCGIFADDR ioctl,
+    without spawning `ip`.
+    """
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        ifreq = fcntl.ioctl(s.fileno(), SIOCGIFADDR, struct.pack("256s", ifname.encode()[:15]))
+        return socket.inet_ntoa(ifreq[20:24])
+    except OSError:
         return None
-    return int(match.group(1))
+    finally:
+        s.close()
+
+def get_default_gw_ipv4() -> str | None:
+    """
+    Return the IPv4 default gateway from /proc/net/route, without spawning
+    `ip route show default` and splitting its text output.
+    """
+    try:
+        with open("/proc/net/route") as f:
+            next(f)  # header
+            for line in f:
+                fields = line.split()
+                # Destination and Mask 0 = default route; RTF_GATEWAY (0x2) set
+                if fields[1] == "00000000" and fields[7] == "00000000" and int(fields[3], 16) & 0x2:
+                    return socket.inet_ntoa(struct.pack("<L", int(fields[2], 16)))
+    except (OSError, ValueError, IndexError, StopIteration):
+        pass
+    return None
 
 def resolve_vxlan_mtu(node_cfg: dict) -> int:
     mtu_override = node_cfg.get("mtu")
@@ -106,23 +290,25 @@ def resolve_vxlan_mtu(node_cfg: dict) -> int:
 
 def build_netem_opts(l):
     """
-    Build netem options dictionary from link descriptor `l`,
-    including only non-empty values.
+    Build the netem argument tuple (e.g. ("delay", "5ms", "rate", "10mbit"))
+    from link descriptor `l`, including only non-empty values.
     """
-    netem_opts = {}
-
-    # One-argument netem options
-    for key in [
-        "limit",
-        "delay",
-        "rate",
-        "loss",
-    ]:
-        val = l.get(key)
-        if val not in (None, "", []):
-            netem_opts[key] = val
-    return netem_opts
+    return _netem_args(*(
+        None if l.get(key) in (None, "", []) else str(l.get(key))
+        for key, _ in NETEM_KEYWORDS
+    ))
+
+@functools.lru_cache(maxsize=256)
+def _netem_args(*values) -> tuple:
+    # Links sharing the same netem profile share one cached tuple
+    return tuple(
+        arg
+        for (_, keywords), val in zip(NETEM_KEYWORDS, values)
+        if val is not None
+        for arg in (*keywords, val)
+    )
 
+@functools.lru_cache(maxsize=32)
 def _parse_cidr(cidr: str):
     if not cidr:
         return None
@@ -161,70 +347,72 @@ def process_initial_topology(etcd_client):
     Uses 'add' action for everything found.
     """
     log.info("🏗️  Processing Initial Topology ...")
-    
+
+    # Prefetch all node IPs at once instead of one Get per link endpoint
+    remote_ips.update(get_remote_ips(etcd_client))
+
     ## Process links add
+    # Links are keyed per endpoint (/config/links/<node>/<iface>), so every
+    # entry under KEY_LINKS_PREFIX already involves this node.
+    pending = []
     for value, meta in etcd_client.get_prefix(KEY_LINKS_PREFIX):
-        l = json.loads(value.decode())
-        ep1, ep2 = l.get("endpoint1"), l.get("endpoint2")
-        
-        if ep1 != node_name and ep2 != node_name: 
-            log.info(f"⚠️  Skipping initial link {ep1}<->{ep2} not relevant to this node.")
-            continue
-
-        ## Get remote IPs in a retry loop of 10 attempts
-        ip1 = ip2 = None
-        counter = 0
-        while counter < 10:
-            ip1 = get_remote_ip(etcd_client, ep1)
-            ip2 = get_remote_ip(etcd_client, ep2)
-            if ip1 and ip2: break
-            time.sleep(2)
-            counter += 1
-        if not ip1 or not ip2: 
-            log.warning(f"⚠️  Skipping initial link {ep1}<->{ep2} due to missing IPs.")
-            continue
-        
+        l = json_loads(value)
         vni = str(l.get("vni", "0"))
         if vni == "0":
-            log.warning(f"⚠️  Skipping initial link {ep1}<->{ep2} due to missing VNI.")
+            log.warning(f"⚠️  Skipping initial link {l.get('endpoint1')}<->{l.get('endpoint2')} due to missing VNI.")
             continue
-        
-        netem_opts = build_netem_opts(l)
-
-        key_str = meta.key.decode()
         # Extract interface name from the key, it is the last part of the key after /
-        vxlan_if = key_str.split('/')[-1]
-        # ADD for found link
-        if ep1 == node_name:
-            remote_ip = ip2
-            local_ip = ip1
-        else:
-            remote_ip = ip1
-            local_ip = ip2
-        
-        threading.Thread(
-            target=create_vxlan_link,
-            kwargs={
+        pending.append((key_leaf(meta.key), vni, l))
+
+    ## Resolve remote IPs in up to 10 rounds; links whose peers are not
+    ## registered yet wait for the next round instead of blocking the others
+    tasks = []
+    for attempt in range(10):
+        if attempt and SHUTDOWN.wait(2):
+            return
+        waiting = []
+        # Fetch every peer still unknown in one go, the loop below then hits the cache
+        lookup_remote_ips(etcd_client, *(ep for _, _, l in pending for ep in (l.get("endpoint1"), l.get("endpoint2"))))
+        for vxlan_if, vni, l in pending:
+            ep1, ep2 = l.get("endpoint1"), l.get("endpoint2")
+            ip1, ip2 = lookup_remote_ips(etcd_client, ep1, ep2)
+            if not ip1 or not ip2:
+                waiting.append((vxlan_if, vni, l))
+                continue
+            # ADD for found link
+            if ep1 == node_name:
+                remote_ip = ip2
+                local_ip = ip1
+            else:
+                remote_ip = ip1
+                local_ip = ip2
+            tasks.append({
                 "vxlan_if": vxlan_if,
                 "target_vni": vni,
                 "remote_ip": remote_ip,
                 "local_ip": local_ip,
-                "netem_opts": netem_opts,
-            },
-            daemon=True,
-        ).start()
-    
+                "netem_opts": build_netem_opts(l),
+            })
+        pending = waiting
+        if not pending:
+            break
+    for _, _, l in pending:
+        log.warning(f"⚠️  Skipping initial link {l.get('endpoint1')}<->{l.get('endpoint2')} due to missing IPs.")
+
+    ## All links go through one `ip -batch` and one `tc -batch`
+    if tasks:
+        try:
+            create_vxlan_links(tasks)
+        except Exception:
+            log.exception("❌ Failed to create initial links.")
+
     ## Execute any pending runtime commands (legacy per-node + per-type)
     for run_key in [KEY_RUN, KEY_RUN_TYPE]:
         if not run_key:
             continue
         val, _ = etcd_client.get(run_key)
         if val:
-            threading.Thread(
-                target=execute_commands,
-                args=(val.decode(),),
-                daemon=True
-            ).start()
+            execute_commands(val.decode())
     
     log.info("📝 Updating /etc/hosts with known nodes (IPv4 + IPv6, one line per hostname)...")
 
@@ -234,7 +422,7 @@ def process_initial_topology(etcd_client):
 
     def _bootstrap_hosts_from_prefix(prefix: str):
         for value, meta in etcd_client.get_prefix(prefix):
-            node_name = meta.key.decode().split('/')[-1]
+            node_name = key_leaf(meta.key)
             ip_addr = value.decode().strip()
             if not ip_addr:
                 continue
@@ -248,13 +436,6 @@ def process_initial_topology(etcd_client):
 # ----------------------------
 #   Link Management & Runtime Commands
 # ----------------------------
-def link_exists(ifname):
-    return subprocess.run(
-        ["ip", "link", "show", ifname],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    ).returncode == 0
-
 def create_vxlan_link(
     vxlan_if,
     target_vni,
@@ -262,71 +443,165 @@ def create_vxlan_link(
     local_ip,
     netem_opts=None
     ):
+    create_vxlan_links([{
+        "vxlan_if": vxlan_if,
+        "target_vni": target_vni,
+        "remote_ip": remote_ip,
+        "local_ip": local_ip,
+        "netem_opts": netem_opts,
+    }])
+
+def vxlan_ip_cmds(vxlan_if, target_vni, remote_ip, local_ip) -> list:
+    ip_cmds = [
+        ["link", "add", vxlan_if,
+         "type", "vxlan",
+         "id", str(target_vni),
+         "remote", remote_ip,
+         "local", local_ip,
+         "dev", "eth0",
+         "dstport", "4789"],
+        ["link", "set", vxlan_if, "mtu", str(vxlan_link_mtu)],
+        ["link", "set", "dev", vxlan_if, "up"],
+    ]
+
+    # ----------------------------
+    # L3 addressing (IPv4 / IPv6)
+    # ----------------------------
+    # Addresses are derived once in main() from the node L3-config
+    if vxlan_v4_addr:
+        # ipv4 need IP address assigned to the interface. So we assign the same IP as the loopback (last usable) but with /32 mask that is not advertized by the rule in ISIS template.
+        ip_cmds.append(["addr", "add", vxlan_v4_addr, "dev", vxlan_if])
+    return ip_cmds
+
+def create_vxlan_links(tasks):
+    """
+    Create several VXLAN links (create_vxlan_link kwargs) with one `ip -batch`
+    (or netlink, when pyroute2 is available) and one `tc -batch` for all of them.
+    """
+    # No existence probe: `link add` fails with "File exists" when the
+    # link is already there; the remaining steps are idempotent.
+    existing = set()
+    if ipr is not None:
+        for task in tasks:
+            log.info(f"🛜 Creating Link: {task['vxlan_if']} (VNI: {task['target_vni']})")
+            if create_vxlan_link_netlink(task["vxlan_if"], task["target_vni"], task["remote_ip"], task["local_ip"]):
+                existing.add(task["vxlan_if"])
+    else:
+        ip_cmds, lines = [], {}
+        for task in tasks:
+            log.info(f"🛜 Creating Link: {task['vxlan_if']} (VNI: {task['target_vni']})")
+            cmds = vxlan_ip_cmds(task["vxlan_if"], task["target_vni"], task["remote_ip"], task["local_ip"])
+            lines[task["vxlan_if"]] = range(len(ip_cmds) + 1, len(ip_cmds) + len(cmds) + 1)
+            ip_cmds += cmds
+        errors = batch_errors(run_batch("ip", ip_cmds, log_errors=False).stderr or "")
+        for vxlan_if, link_lines in lines.items():
+            if "File exists" in errors.get(link_lines[0], ""):
+                existing.add(vxlan_if)
+            elif any(n in errors for n in link_lines):
+                log.warning(f"⚠️ Batch failed: ip -batch for {vxlan_if}")
+                log.warning("; ".join(errors[n] for n in link_lines if n in errors))
+
+    tc_links = []
+    for task in tasks:
+        vxlan_if, netem_opts = task["vxlan_if"], task.get("netem_opts")
+        if vxlan_if in existing:
+            # ⛔ If already exists, only update netem
+            log.info(f"♻️ Link {vxlan_if} already exists, updating...")
+        else:
+            if vxlan_v4_addr:
+                log.info(f" ✅ VXLAN {vxlan_if} IPv4 set to {vxlan_v4_addr}.")
+
+            # Routing hook (keep your current behavior)
+            if (vxlan_v4_addr or vxlan_v6_ip) and l3_flags.get("enable-routing", False) and routing is not None:
+                msg, success = routing.link_add(etcd_client, node_name, vxlan_if)
+                if success:
+                    log.info(msg)
+                else:
+                    log.error(msg)
 
-    # ⛔ If already exists, do nothing
-    if link_exists(vxlan_if):
-        log.info(f"♻️ Link {vxlan_if} already exists, updating...")
         if l3_flags.get("enable-netem", True):
             if netem_opts:
-                apply_tc_settings(vxlan_if=vxlan_if, netem_opts=netem_opts)
+                tc_links.append((vxlan_if, netem_opts))
             else:
                 log.info(f" 🎛️  No netem options defined for {vxlan_if}, skipping tc")
-        return
-    
-    log.info(f"🛜 Creating Link: {vxlan_if} (VNI: {target_vni})")
-
-    run([
-        "ip", "link", "add", vxlan_if,
-        "type", "vxlan",
-        "id", str(target_vni),
-        "remote", remote_ip,
-        "local", local_ip,
-        "dev", "eth0",
-        "dstport", "4789",
-    ])
-
-    run(["ip", "link", "set", vxlan_if, "mtu", str(vxlan_link_mtu)])
-    run(["ip", "link", "set", "dev", vxlan_if, "up"])
-    
-    # ----------------------------
-    # L3 addressing (IPv4 / IPv6)
-    # ----------------------------
-    l3_cfg = my_config.get("L3-config", {})
+    if tc_links:
+        apply_tc_batch(tc_links)
 
-    # IPv4 (existing behavior, but without hosts() iteration)
-    v4_net = _parse_cidr(l3_cfg.get("cidr", ""))
-    v4_ip = pick_last_usable_ip(v4_net)
-    if v4_ip:
-        # ipv4 need IP address assigned to the interface. So we assign the same IP as the loopback (last usable) but with /32 mask that is not advertized by the rule in ISIS template.
-        v4_addr = f"{v4_ip}/32"
-        run(["ip", "addr", "add", v4_addr, "dev", vxlan_if])
-        log.info(f" ✅ VXLAN {vxlan_if} IPv4 set to {v4_addr}.")
+def create_vxlan_link_netlink(vxlan_if, target_vni, remote_ip, local_ip) -> bool:
+    """
+    Netlink equivalent of the `ip -batch` commands in create_vxlan_link,
+    without forking `ip`. Returns True if the link already exists.
+    """
+    with IPR_LOCK:
+        try:
+            ipr.link(
+                "add",
+                ifname=vxlan_if,
+                kind="vxlan",
+                vxlan_id=int(target_vni),
+                vxlan_link=eth0_index,
+                vxlan_local=local_ip,
+                vxlan_group=remote_ip,
+                vxlan_port=4789,
+            )
+            idx = ipr.link_lookup(ifname=vxlan_if)[0]
+            ipr.link("set", index=idx, mtu=vxlan_link_mtu, state="up")
+            if vxlan_v4_addr:
+                addr, prefixlen = vxlan_v4_addr.split("/")
+                ipr.addr("add", index=idx, address=addr, prefixlen=int(prefixlen))
+        except NetlinkError as e:
+            if e.code == errno.EEXIST:
+                return True
+            log.warning(f"⚠️ Netlink setup failed for {vxlan_if}: {e}")
+        except Exception as e:
+            log.warning(f"⚠️ Netlink setup failed for {vxlan_if}: {e}")
+    return False
 
-    # IPv6
-    v6_net = _parse_cidr(l3_cfg.get("cidr-v6", ""))
-    v6_ip = pick_last_usable_ip(v6_net)
+def setup_underlay(lo_addrs, route_dst, route_gw):
+    """
+    Add the loopback addresses and the sat-vnet-super-cidr route at boot.
+    With pyroute2 this is one netlink session instead of an `ip` fork per
+    address; already-present entries are left as they are.
+    """
+    if ipr is None:
+        for addr in lo_addrs:
+            run(["ip", "addr", "add", addr, "dev", "lo"])
+        run(["ip", "route", "add", route_dst, "via", route_gw])
+        return
 
-    # Routing hook (keep your current behavior)
-    if (v4_ip or v6_ip) and l3_flags.get("enable-routing", False) and routing is not None:
-        msg, success = routing.link_add(etcd_client, node_name, vxlan_if)
-        if success:
-            log.info(msg)
-        else:
-            log.error(msg)
-    
-    if l3_flags.get("enable-netem", True):
-        if netem_opts:
-            apply_tc_settings(vxlan_if=vxlan_if, netem_opts=netem_opts)
-        else:
-            log.info(f" 🎛️  No netem options defined for {vxlan_if}, skipping tc")
+    with IPR_LOCK:
+        lo_index = ipr.link_lookup(ifname="lo")[0]
+        ipr.link("set", index=lo_index, state="up")
+        for addr in lo_addrs:
+            ip, prefixlen = addr.split("/")
+            try:
+                ipr.addr("add", index=lo_index, address=ip, prefixlen=int(prefixlen))
+            except NetlinkError as e:
+                if e.code != errno.EEXIST:
+                    log.warning(f"⚠️ Command failed: ip addr add {addr} dev lo")
+                    log.warning(str(e))
+        try:
+            ipr.route("add", dst=route_dst, gateway=route_gw)
+        except NetlinkError as e:
+            if e.code != errno.EEXIST:
+                log.warning(f"⚠️ Command failed: ip route add {route_dst} via {route_gw}")
+                log.warning(str(e))
 
 def delete_vxlan_link(
     vxlan_if):
     log.info(f"✂️ Deleting Link: {vxlan_if}")
 
-    run([
-        "ip", "link", "del", vxlan_if
-    ])
+    if ipr is not None:
+        with IPR_LOCK:
+            try:
+                ipr.link("del", ifname=vxlan_if)
+            except Exception as e:
+                log.warning(f"⚠️ Command failed: ip link del {vxlan_if}")
+                log.warning(str(e))
+    else:
+        run([
+            "ip", "link", "del", vxlan_if
+        ])
     log.info(f" ✅ VXLAN {vxlan_if} deleted.")
     if l3_flags.get("enable-routing", False) and routing is not None:
         msg, success = routing.link_del(etcd_client, node_name, vxlan_if)
@@ -348,188 +623,353 @@ def apply_tc_settings(vxlan_if, netem_opts):
         log.info(f" 🎛️ No netem options provided for {vxlan_if}, skipping tc.")
         return
     
-    log.info(f" 🎛️ Applying TC netem on {vxlan_if}: {netem_opts}")
-
-    # Build netem command args (shared by add/change/replace)
-    netem_args = ["netem"]
-    if "rate" in netem_opts:
-        netem_args += ["rate", str(netem_opts["rate"])]
-    if "delay" in netem_opts:
-        netem_args += ["delay", str(netem_opts["delay"])]
-    if "loss" in netem_opts:
-        netem_args += ["loss", "random", str(netem_opts["loss"])]
-    if "limit" in netem_opts:
-        netem_args += ["limit", str(netem_opts["limit"])]
-
-    root_cmd = ["tc", "qdisc", "add", "dev", vxlan_if, "root", "handle", "1:"] + netem_args
-    root_change_cmd = ["tc", "qdisc", "change", "dev", vxlan_if, "root", "handle", "1:"] + netem_args
-    fq_cmd = ["tc", "qdisc", "replace", "dev", vxlan_if, "parent", "1:1", "handle", "10:", "fq"]
-
-    out = run(["tc", "qdisc", "show", "dev", vxlan_if], log_errors=False)
-    qdisc_output = out.stdout if out and out.stdout else ""
-    qdisc_lines = qdisc_output.splitlines()
-
-    has_root_netem_handle = any(
-        line.startswith("qdisc netem 1:") and " root " in line
-        for line in qdisc_lines
-    )
-    has_any_root_qdisc = any(" root " in line for line in qdisc_lines)
+    apply_tc_batch([(vxlan_if, netem_opts)])
+
+def netem_tc_cmds(vxlan_if, netem_opts) -> list:
+    return [
+        ["qdisc", "replace", "dev", vxlan_if, "root", "handle", "1:", "netem", *netem_opts],
+        ["qdisc", "replace", "dev", vxlan_if, "parent", "1:1", "handle", "10:", "fq"],
+    ]
+
+def apply_tc_batch(links):
+    """
+    Apply netem+fq (see apply_tc_settings) to several (vxlan_if, netem_opts)
+    pairs with a single `tc -batch`.
+    """
+    tc_cmds = []
+    for vxlan_if, netem_opts in links:
+        log.info(f" 🎛️ Applying TC netem on {vxlan_if}: {' '.join(netem_opts)}")
+        tc_cmds += netem_tc_cmds(vxlan_if, netem_opts)
+
+    # No `tc qdisc show` probe: `replace` changes an existing netem 1: in
+    # place or grafts a new root over whatever is there. Only a foreign
+    # root already holding handle 1: makes the root line fail; rebuild the tree then.
+    errors = batch_errors(run_batch("tc", tc_cmds, log_errors=False).stderr or "")
+    rebuild = []
+    for i, (vxlan_if, netem_opts) in enumerate(links):
+        root_line = 2 * i + 1
+        if root_line in errors:
+            rebuild += [["qdisc", "del", "dev", vxlan_if, "root"], *netem_tc_cmds(vxlan_if, netem_opts)]
+        elif root_line + 1 in errors:
+            log.warning(f"⚠️ Batch failed: tc -batch for {vxlan_if}")
+            log.warning(errors[root_line + 1])
+    if rebuild:
+        run_batch("tc", rebuild)
+
+def on_link_put(etcd_client, event, vxlan_if):
+    """Add/Update"""
+    # Cheap prefilter: skip the JSON parse when our name is not in the payload
+    if node_name.encode() not in event.value:
+        log.error(f" ❌ Link action {vxlan_if} not relevant to this node.")
+        return
+    l = json_loads(event.value)
+    ep1, ep2 = l.get("endpoint1"), l.get("endpoint2")
+    if ep1 != node_name and ep2 != node_name:
+        log.error(f" ❌ Link action {ep1}<->{ep2} not relevant to this node.")
+        return
+
+    ip1, ip2 = lookup_remote_ips(etcd_client, ep1, ep2)
+    if not ip1 or not ip2:
+        log.error(f" ❌ Missing IPs for link action {ep1}<->{ep2}.")
+        return
 
-    if has_root_netem_handle:
-        run(root_change_cmd)
+    vni = str(l.get("vni", "0"))
+    if ep1 == node_name:
+        remote_ip = ip2
+        local_ip = ip1
     else:
-        if has_any_root_qdisc:
-            # Rebuild the tree when the existing root is incompatible or unnamed.
-            run(["tc", "qdisc", "del", "dev", vxlan_if, "root"], log_errors=False)
-        run(root_cmd)
+        remote_ip = ip1
+        local_ip = ip2
+    netem_opts = build_netem_opts(l)
+    create_vxlan_link(
+        vxlan_if=vxlan_if,
+        target_vni=vni,
+        remote_ip=remote_ip,
+        local_ip=local_ip,
+        netem_opts=netem_opts,
+    )
 
-    run(fq_cmd)
+def on_link_delete(etcd_client, event, vxlan_if):
+    # interface delete removes possible TC automatically
+    delete_vxlan_link(vxlan_if)
+
+LINK_EVENT_HANDLERS = {
+    etcd3.events.PutEvent: on_link_put,
+    etcd3.events.DeleteEvent: on_link_delete,
+}
 
 def process_link_action(etcd_client, event):
+    handler = LINK_EVENT_HANDLERS.get(type(event))
+    if handler is None:
+        return
+    # Extract interface name, it is the last part of the key after /
+    vxlan_if = key_leaf(event.key)
     try:
-        key_str = event.key.decode()
-        # Extract interface name, it is the last part of the key after /
-        vxlan_if = key_str.split('/')[-1]
-
-        ## Process PutEvent (Add/Update)
-        if isinstance(event, etcd3.events.PutEvent):
-                l = json.loads(event.value.decode())
-                ep1, ep2 = l.get("endpoint1"), l.get("endpoint2")
-                if ep1 != node_name and ep2 != node_name:
-                    log.error(f" ❌ Link action {ep1}<->{ep2} not relevant to this node.")
-                    return
-
-                ip1 = get_remote_ip(etcd_client, ep1)
-                ip2 = get_remote_ip(etcd_client, ep2)
-                if not ip1 or not ip2:
-                    log.error(f" ❌ Missing IPs for link action {ep1}<->{ep2}.")
-                    return
-                
-                vni = str(l.get("vni", "0"))
-                if ep1 == node_name:
-                    remote_ip = ip2
-                    local_ip = ip1
-                else:
-                    remote_ip = ip1
-                    local_ip = ip2
-                netem_opts = build_netem_opts(l)
-                threading.Thread(
-                    target=create_vxlan_link,
-                    kwargs={
-                        "vxlan_if": vxlan_if,
-                        "target_vni": vni,
-                        "remote_ip": remote_ip,
-                        "local_ip": local_ip,
-                        "netem_opts": netem_opts,
-                    },
-                    daemon=True,
-                ).start()
-        
-        ## Process DeleteEvent
-        elif isinstance(event, etcd3.events.DeleteEvent):
-                # interface delete removes possible TC automatically 
-                threading.Thread(
-                    target=delete_vxlan_link,
-                    args=(vxlan_if,),
-                    daemon=True,
-                ).start()
-    except: 
+        handler(etcd_client, event, vxlan_if)
+    except json.JSONDecodeError:
         log.error(" ❌ Failed to parse link action.")
-        return
 
 # ----------------------------
 #   WATCHERS
 # ----------------------------
-def watch_link_actions_loop():
-    log.info("👀 Watching /config/links (Dynamic Events)...")
-    backoff = 1
+def queue_link_action(event):
+    """
+    Coalesce bursts of link events (e.g. an epoch touching many links):
+    events are buffered per interface for LINK_EVENT_DEBOUNCE_S and only
+    the latest one of each interface is applied. A delete followed by a put
+    within the window is kept as delete + put, so the link is rebuilt.
+    """
+    global pending_link_timer
+    vxlan_if = key_leaf(event.key)
+    with pending_link_lock:
+        pending_delete = pending_link_events.get(vxlan_if, (None, None))[0]
+        if isinstance(event, etcd3.events.DeleteEvent):
+            pending_delete = event
+        pending_link_events[vxlan_if] = (pending_delete, event)
+        if pending_link_timer is None:
+            pending_link_timer = threading.Timer(LINK_EVENT_DEBOUNCE_S, flush_link_actions)
+            pending_link_timer.daemon = True
+            pending_link_timer.start()
+
+def flush_link_actions():
+    global pending_link_timer
+    with pending_link_lock:
+        events = {
+            vxlan_if: [latest] if pending_delete in (None, latest) else [pending_delete, latest]
+            for vxlan_if, (pending_delete, latest) in pending_link_events.items()
+        }
+        pending_link_events.clear()
+        pending_link_timer = None
+    for vxlan_if, if_events in events.items():
+        dispatch_link_events(vxlan_if, if_events)
+
+def dispatch_link_events(vxlan_if, events):
+    """
+    Hand events of one interface to its link worker, starting it if idle.
+    Interfaces are handled in parallel, events of one interface in order.
+    """
+    with link_work_lock:
+        if vxlan_if in link_work:
+            link_work[vxlan_if].extend(events)
+            return
+        link_work[vxlan_if] = list(events)
+    threading.Thread(target=link_worker, args=(vxlan_if,), daemon=True).start()
+
+def link_worker(vxlan_if):
     while True:
-        cancel = None
-        try:
-            events_iterator, cancel = etcd_client.watch_prefix(KEY_LINKS_PREFIX)
-            for event in events_iterator:
+        with link_work_lock:
+            events = link_work[vxlan_if]
+            if not events:
+                del link_work[vxlan_if]
+                return
+            link_work[vxlan_if] = []
+        for event in events:
+            try:
                 process_link_action(etcd_client, event)
-        except Exception as ex:
-            log.exception("❌ Failed to watch link actions (will retry).")
-            time.sleep(backoff)
-            backoff = min(backoff * 2, 30)
+            except Exception:
+                log.exception(f"❌ Link action failed for {event.key.decode()}")
+
+def process_run_event(event):
+    if not getattr(event, "value", None):
+        return
+    execute_commands(event.value.decode())
+
+def process_etchosts_event(event):
+    """
+    Apply an etc-hosts event (IPv4 or IPv6) to /etc/hosts.
+    Values are expected to be literal IP strings (v4 or v6).
+    """
+    handler = ETCHOSTS_EVENT_HANDLERS.get(type(event))
+    if handler is not None:
+        handler(key_leaf(event.key), event)
+
+def on_etchosts_put(node_name, event):
+    ip_addr = event.value.decode().strip()
+    if ip_addr:
+        update_hosts_entry(node_name, ip_addr)
+
+def on_etchosts_delete(node_name, event):
+    remove_hosts_entry(node_name)
+
+ETCHOSTS_EVENT_HANDLERS = {
+    etcd3.events.PutEvent: on_etchosts_put,
+    etcd3.events.DeleteEvent: on_etchosts_delete,
+}
+
+def process_node_event(event):
+    """
+    Keep remote_ips in sync with /config/nodes/ so link events resolve
+    peers from the cache, also when a node is re-deployed with a new IP,
+    and keep this node's L3 flags current without a Get per link event.
+    """
+    handler = NODE_EVENT_HANDLERS.get(type(event))
+    if handler is not None:
+        handler(key_leaf(event.key), event)
+
+def on_node_put(name, event):
+    global l3_flags
+    if name == node_name:
+        # Link events read the cached L3 flags, refresh them when our config changes
+        l3_flags = json_loads(event.value).get("L3-config", {})
+    # Cheap prefilter: a (re)deployed node has no eth0_ip until its agent registers
+    ip = json_loads(event.value).get("eth0_ip") if b"eth0_ip" in event.value else None
+    if ip:
+        remote_ips[name] = ip
+    else:
+        remote_ips.pop(name, None)
+
+def on_node_delete(name, event):
+    remote_ips.pop(name, None)
+
+NODE_EVENT_HANDLERS = {
+    etcd3.events.PutEvent: on_node_put,
+    etcd3.events.DeleteEvent: on_node_delete,
+}
+
+def watch_loop():
+    """
+    Watch links, runtime commands, etc-hosts and node IPs from a single thread.
+
+    All watches are registered as callbacks on the shared client, so they are
+    multiplexed over its one gRPC watch stream; callbacks only enqueue the
+    responses and this loop dispatches them. On a stream failure every watch
+    is re-created with exponential backoff, resuming from its last revision.
+    """
+    watches = [
+        (KEY_LINKS_PREFIX, True, queue_link_action),
+        # One watch covers both /config/etchosts/ and /config/etchosts6/
+        ("/config/etchosts", True, process_etchosts_event),
+        ("/config/nodes/", True, process_node_event),
+    ]
+    for run_key in [KEY_RUN, KEY_RUN_TYPE]:
+        if run_key:
+            watches.append((run_key, False, process_run_event))
+    log.info(f"👀 Watching {[key for key, _, _ in watches]} (Dynamic Events)...")
+
+    # Per watch, the first revision not dispatched yet: a re-created watch
+    # resumes there, so events written while the stream was down are replayed
+    # instead of lost, and events already handled are not delivered twice.
+    # Progress notifications advance it also for keys that are rarely written.
+    next_revision = {}
+    attempt = 0
+
+    def add_watch(client, responses, key, is_prefix, handler):
+        callback = lambda response: responses.put((key, is_prefix, handler, response))
+        add = client.add_watch_prefix_callback if is_prefix else client.add_watch_callback
+        try:
+            return add(key, callback, start_revision=next_revision[key], progress_notify=True)
+        except etcd3.exceptions.RevisionCompactedError as e:
+            # Only this watch fell behind the compaction: resume it from the
+            # oldest revision still available, the other watches keep theirs
+            log.warning(f"⚠️ Watch on {key} resumes at compacted revision {e.compacted_revision}, older events are lost.")
+            next_revision[key] = e.compacted_revision
+            return add(key, callback, start_revision=next_revision[key], progress_notify=True)
+
+    while True:
+        # Fresh queue per attempt so errors from a dead stream are not replayed
+        responses = queue.Queue()
+        watch_ids = {}
+        client = get_etcd_client()
+        try:
+            if not next_revision:
+                start = client.get_response(KEY_LINKS_PREFIX).header.revision + 1
+                next_revision = {key: start for key, _, _ in watches}
+            for key, is_prefix, handler in watches:
+                watch_ids[key] = add_watch(client, responses, key, is_prefix, handler)
+            attempt = 0
+
+            while True:
+                key, is_prefix, handler, response = responses.get()
+                if isinstance(response, etcd3.exceptions.RevisionCompactedError):
+                    # etcd3 already cancelled the compacted watch, re-create just that one
+                    next_revision[key] = max(next_revision[key], response.compacted_revision)
+                    watch_ids[key] = add_watch(client, responses, key, is_prefix, handler)
+                    continue
+                if isinstance(response, Exception):
+                    raise response
+                for event in response.events:
+                    try:
+                        handler(event)
+                    except Exception:
+                        # This ensures a bad value never kills the watch loop
+                        log.exception(f"❌ Failed to process event on {event.key.decode()}.")
+                # Every response, also an empty progress notification, covers
+                # this watch up to its header revision
+                next_revision[key] = max(
+                    next_revision[key],
+                    response.header.revision + 1,
+                    *(event.mod_revision + 1 for event in response.events),
+                )
+        except Exception as e:
+            log.exception("❌ Watch stream failed (will retry).")
+            time.sleep(retry_backoff(attempt))
+            attempt += 1
+            if needs_reconnect(e):
+                get_etcd_client(force_reconnect=True)
         finally:
-            if cancel is not None:
+            for watch_id in watch_ids.values():
                 try:
-                    cancel()
+                    client.cancel_watch(watch_id)
                 except Exception:
                     pass
 
-def watch_command_loop():
-    run_keys = [k for k in [KEY_RUN, KEY_RUN_TYPE] if k]
-    log.info(f"👀 Watching Runtime Commands on keys: {run_keys}")
+def _drop_hosts_lines(hosts_content: str, node_name: str) -> str:
+    """
+    Return hosts_content without the lines whose last field is node_name
+    (lines like "<anything>  node_name" with spaces/tabs).
+    """
+    kept = []
+    for line in hosts_content.splitlines(keepends=True):
+        fields = line.split()
+        if len(fields) > 1 and fields[-1] == node_name:
+            continue
+        kept.append(line)
+    return "".join(kept)
 
-    def _watch_one(run_key: str):
-        backoff = 1
-        while True:
-            cancel = None
-            try:
-                events, cancel = etcd_client.watch(run_key)
-                for e in events:
-                    if not getattr(e, "value", None):
-                        continue
-                    try:
-                        threading.Thread(
-                            target=execute_commands,
-                            args=(e.value.decode(),),
-                            daemon=True
-                        ).start()
-                    except Exception:
-                        # This ensures a bad value never kills the watch loop
-                        log.exception("❌ Runtime command processing failed (but watcher continues).")
-            except Exception:
-                log.exception(f"❌ Failed to watch runtime commands on {run_key} (will retry).")
-                time.sleep(backoff)
-                backoff = min(backoff * 2, 30)
-            finally:
-                if cancel is not None:
-                    try:
-                        cancel()
-                    except Exception:
-                        pass
+def _render_hosts() -> str:
+    """
+    Render /etc/hosts from the unmanaged base content plus the managed entries.
+    Must be called with HOSTS_LOCK held.
+    """
+    content = hosts_base
+    if content and not content.endswith("\n"):
+        content += "\n"
+    return content + "".join(f"{ip}\t{name}\n" for name, ip in hosts_entries.items())
 
-    for run_key in run_keys:
-        threading.Thread(target=_watch_one, args=(run_key,), daemon=True).start()
-    while True:
-        time.sleep(1)
-   
+def _take_over_hosts_name(node_name: str) -> None:
+    """
+    Start managing node_name: read /etc/hosts once on first use and drop any
+    line for node_name from the unmanaged base content.
+    Must be called with HOSTS_LOCK held.
+    """
+    global hosts_base
+    if hosts_base is None:
+        with open("/etc/hosts", "r") as f:
+            hosts_base = f.read()
+    if node_name not in hosts_managed:
+        hosts_base = _drop_hosts_lines(hosts_base, node_name)
+        hosts_managed.add(node_name)
 
 def update_hosts_entry(node_name: str, ip_addr: str) -> None:
     """
     Ensure /etc/hosts contains exactly one entry for node_name:
         <ip_addr>\t<node_name>
     Removes any previous entries for node_name (IPv4 or IPv6).
+    The file is only rewritten when the entry actually changes.
     """
     if not node_name or not ip_addr:
         return
 
     try:
         with HOSTS_LOCK:
-            # Read current hosts
-            with open("/etc/hosts", "r") as f:
-                hosts_content = f.read()
-
-            # Remove any existing entry for this hostname (any IP)
-            # Matches lines like: "<anything>  node_name" with spaces/tabs
-            hosts_content = re.sub(
-                rf"^[^\n]*\s+{re.escape(node_name)}\s*$\n?",
-                "",
-                hosts_content,
-                flags=re.MULTILINE
-            )
-
-            # Append the new entry
-            if not hosts_content.endswith("\n"):
-                hosts_content += "\n"
-            hosts_content += f"{ip_addr}\t{node_name}\n"
+            _take_over_hosts_name(node_name)
+            if hosts_entries.get(node_name) == ip_addr:
+                return
+            hosts_entries[node_name] = ip_addr
 
+            # Rewritten in place: Docker bind-mounts /etc/hosts, so it cannot be replaced by rename
             with open("/etc/hosts", "w") as f:
-                f.write(hosts_content)
+                f.write(_render_hosts())
 
         log.info(f"✅ Updated /etc/hosts entry: {ip_addr} {node_name}")
     except Exception as e:
@@ -543,99 +983,73 @@ def remove_hosts_entry(node_name: str) -> None:
         return
     try:
         with HOSTS_LOCK:
-            with open("/etc/hosts", "r") as f:
-                hosts_content = f.read()
-
-            new_content = re.sub(
-                rf"^[^\n]*\s+{re.escape(node_name)}\s*$\n?",
-                "",
-                hosts_content,
-                flags=re.MULTILINE
-            )
+            _take_over_hosts_name(node_name)
+            hosts_entries.pop(node_name, None)
 
             with open("/etc/hosts", "w") as f:
-                f.write(new_content)
+                f.write(_render_hosts())
 
         log.info(f"✅ Removed /etc/hosts entry for: {node_name}")
     except Exception as e:
         log.error(f"❌ Failed to remove /etc/hosts entry for {node_name}: {e}")
 
-def watch_etchosts_prefix(prefix: str):
+def reap_command_batches():
     """
-    Watch a given etc-hosts prefix (IPv4 or IPv6) and apply changes to /etc/hosts.
-    Values are expected to be literal IP strings (v4 or v6).
+    Collect exit status of finished command batches. Called from the main
+    loop every COMMAND_REAP_INTERVAL_S and before each new batch, so a
+    finished batch stays a zombie for at most about a second.
     """
-    log.info(f"👀 Watching {prefix} (Dynamic Events)...")
-    backoff = 1
-    while True:
-        cancel = None
-        try:
-            events_iterator, cancel = etcd_client.watch_prefix(prefix)
-            for event in events_iterator:
-                try:
-                    node_name = event.key.decode().split('/')[-1]
-
-                    if isinstance(event, etcd3.events.PutEvent):
-                        ip_addr = event.value.decode().strip()
-                        if ip_addr:
-                            update_hosts_entry(node_name, ip_addr)
-
-                    elif isinstance(event, etcd3.events.DeleteEvent):
-                        remove_hosts_entry(node_name)
-
-                except Exception:
-                    log.exception(f"❌ Failed to process {prefix} event.")
-                    continue
-
-        except Exception:
-            log.exception(f"❌ Failed to watch {prefix} (will retry).")
-            time.sleep(backoff)
-            backoff = min(backoff * 2, 30)
-        finally:
-            if cancel is not None:
-                try:
-                    cancel()
-                except Exception:
-                    pass       
+    with running_batches_lock:
+        for p in list(running_batches):
+            rc = p.poll()
+            if rc is None:
+                continue
+            running_batches.discard(p)
+            if rc != 0:
+                log.warning(f"⚠️ Command batch (pid {p.pid}) exited with code {rc}")
 
 def run_commands_sequentially(commands):
     for cmd in commands:
         log.info("▶️  exec: %s", cmd)
-        subprocess.run(
-            ["/bin/bash", "-c", cmd],
-            shell=False,
-            check=False
-        )
+    # One bash for the whole batch; newline-separated so a failing command
+    # does not stop the next ones (same as the former one-bash-per-command).
+    # Started without waiting: no helper thread is needed, the child is
+    # reaped by reap_command_batches() from the main loop.
+    p = subprocess.Popen(
+        ["/bin/bash", "-c", "\n".join(commands)],
+        shell=False,
+        start_new_session=True
+    )
+    with running_batches_lock:
+        running_batches.add(p)
 
 def execute_commands(commands_raw_str: str) -> None:
     if not commands_raw_str:
         return
+    reap_command_batches()
     try:
-        commands = json.loads(commands_raw_str)
+        commands = json_loads(commands_raw_str)
         if not isinstance(commands, list) or not all(isinstance(c, str) for c in commands):
             return
-        threading.Thread(
-            target=run_commands_sequentially,
-            args=(commands,),
-            daemon=True
-        ).start()
+        run_commands_sequentially(commands)
     except Exception:
-        log.exception("Failed to parse commands JSON")
+        log.exception("Failed to run commands")
 
 # ----------------------------
 #   INIT & MAIN
 # ----------------------------
 def register_my_underlay_ip(etcd_client):
     try:
-        cmd = "ip -4 addr show eth0 | grep -oP '(?<=inet\s)\d+(\.\d+){3}' | head -n1"
-        my_ip = subprocess.check_output(cmd, shell=True).decode().strip()
+        my_ip = get_iface_ipv4("eth0")
         if not my_ip or my_ip.endswith(".0"): return False
         
         def update_key(key):
             val, _ = etcd_client.get(key)
             if not val: return False
+            # Already registered: skip the decode/re-encode round trip
+            if f'"eth0_ip": "{my_ip}"'.encode() in val: return True
             try:
-                data = json.loads(val.decode())
+                data = json_loads(val)
                 if data.get("eth0_ip") != my_ip:
                     data["eth0_ip"] = my_ip
                     etcd_client.put(key, json.dumps(data))
@@ -649,10 +1063,10 @@ def register_my_underlay_ip(etcd_client):
 def get_config(etcd_client):
     val, _ = etcd_client.get(f"/config/nodes/{node_name}")
     if not val: return
-    return json.loads(val.decode())
+    return json_loads(val)
 
 def main():
-    global my_config, l3_flags, etcd_client, routing, vxlan_link_mtu, KEY_RUN_TYPE
+    global my_config, l3_flags, etcd_client, routing, vxlan_link_mtu, vxlan_v4_addr, vxlan_v6_ip, KEY_RUN_TYPE, ipr, eth0_index
     log.info(f"🚀 Sat Agent Starting for {node_name}")
     etcd_client = get_etcd_client()
     my_config = get_config(etcd_client) or {}
@@ -664,7 +1078,13 @@ def main():
     
     # Bootstrapping
     
+    if IPRoute is not None:
+        ipr = IPRoute()
+        eth0_index = ipr.link_lookup(ifname="eth0")[0]
+        log.info("🔌 Using netlink (pyroute2) for link setup")
+
     # Publish node IPs for /etc/hosts usage
+    lo_addrs = []
     l3_cfg = my_config.get("L3-config", {})
 
     v4_net = _parse_cidr(l3_cfg.get("cidr", ""))
@@ -672,7 +1092,8 @@ def main():
     v4_mask = l3_cfg.get("cidr","").split('/')[1] if '/' in l3_cfg.get("cidr","") else '30'
     # assign IP to the loopback interface
     if v4_ip:
-        run(["ip", "addr", "add", f"{v4_ip}/{v4_mask}", "dev", "lo"])
+        vxlan_v4_addr = f"{v4_ip}/32"
+        lo_addrs.append(f"{v4_ip}/{v4_mask}")
         etcd_client.put(f"/config/etchosts/{node_name}", str(v4_ip))
 
     v6_net = _parse_cidr(l3_cfg.get("cidr-v6", ""))
@@ -680,7 +1101,8 @@ def main():
     v6_mask = l3_cfg.get("cidr-v6","").split('/')[1] if '/' in l3_cfg.get("cidr-v6","") else '126'
     # assign IP to the loopback interface
     if v6_ip:
-        run(["ip", "-6", "addr", "add", f"{v6_ip}/{v6_mask}", "dev", "lo"])
+        vxlan_v6_ip = v6_ip
+        lo_addrs.append(f"{v6_ip}/{v6_mask}")
         etcd_client.put(f"/config/etchosts6/{node_name}", str(v6_ip))
     
     ## Insert sat-vnet-super-cidr route with default gateway as next hop. 
@@ -690,24 +1112,22 @@ def main():
     if not val:
         log.error(f"❌ Failed to fetch config data for worker {worker_name}. No config found.")
         sys.exit(1)
-    worker_cfg = json.loads(val.decode())
+    worker_cfg = json_loads(val)
     if "sat-vnet-super-cidr" not in worker_cfg:
         log.error(f"❌ Failed to fetch sat-vnet-super-cidr for worker {worker_name}. Key 'sat-vnet-super-cidr' not found.")
         sys.exit(1)
     sat_vnet_super_cidr = worker_cfg["sat-vnet-super-cidr"]
-    cmd = ["ip", "route", "show", "default"]
-    result = run(cmd)
-    if result.returncode != 0:
+    default_gw = get_default_gw_ipv4()
+    if not default_gw:
         log.error("❌ Failed to fetch default gateway for sat-vnet-super-cidr route.")
         sys.exit(1)
-    default_gw = result.stdout.strip().split()[2]
-    cmd = ["ip", "route", "add", sat_vnet_super_cidr, "via", default_gw]
-    run(cmd)
+    setup_underlay(lo_addrs, sat_vnet_super_cidr, default_gw)
 
     ## Register my IP address in Etcd
-    while True:
-        if register_my_underlay_ip(etcd_client): break
-        time.sleep(2)
+    while not register_my_underlay_ip(etcd_client):
+        if SHUTDOWN.wait(2):
+            log.info("🛑 Shutdown requested before the underlay IP was registered.")
+            sys.exit(0)
 
     # L3 Routing Init
     routing_flags = l3_flags.get("enable-routing", False)
@@ -726,21 +1146,27 @@ def main():
             routing = None
 
     # Start Event Loops
-    threads = [
-        threading.Thread(target=watch_link_actions_loop, daemon=True), # Dynamic
-        threading.Thread(target=watch_command_loop, daemon=True),
-        threading.Thread(target=watch_etchosts_prefix, args=("/config/etchosts/",), daemon=True),
-        threading.Thread(target=watch_etchosts_prefix, args=("/config/etchosts6/",), daemon=True)
-    ]
-    for t in threads: t.start()
+    threading.Thread(target=watch_loop, daemon=True).start()
     
     log.info(f"✅ All Watchers Started.")
 
     # Initial Links Setup
     process_initial_topology(etcd_client)
-    
-    while True: time.sleep(1)
+
+    # Idle until SIGTERM/SIGINT, reaping finished command batches meanwhile,
+    # then release the etcd channel
+    while not SHUTDOWN.wait(COMMAND_REAP_INTERVAL_S):
+        reap_command_batches()
+    log.info("🛑 Sat Agent shutting down.")
+    try:
+        etcd_client.close()
+    except Exception:
+        pass
+
+def _request_shutdown(signum, frame):
+    SHUTDOWN.set()
 
 if __name__ == "__main__":
-    try: main()
-    except: sys.exit(0)
+    signal.signal(signal.SIGTERM, _request_shutdown)
+    signal.signal(signal.SIGINT, _request_shutdown)
+    main()
@@ -77,11 +77,21 @@ import calendar
 import time
 from typing import Dict, Tuple, Set
 
+# Fixed-width ASCII fields of 'YYYY-MM-DDTHH:MM:SSZ'
+ISO_UTC_TIME_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})Z", re.ASCII)
+
 def convert_time_epoch_to_timestamp(time_str: str) -> float:
     """
     Converts ISO-8601 UTC 'YYYY-MM-DDTHH:MM:SSZ' to Unix timestamp (UTC).
     """
     try:
+        # Fast path: only strictly formatted strings skip time.strptime
+        match = ISO_UTC_TIME_RE.fullmatch(time_str)
+        if match:
+            try:
+                return datetime(*map(int, match.groups()), tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                pass  # e.g. a leap second, left to strptime
         st = time.strptime(time_str, "%Y-%m-%dT%H:%M:%SZ")
         return float(calendar.timegm(st))
     except ValueError: